@@ -24,6 +24,12 @@ class PyTest(TestCommand):
 
 _requirements = ['requests_cache', 'requests']
 _modules = ['tvdb_api', 'tvdb_ui', 'tvdb_exceptions']
+_extras = {}
+
+# tvdb_async uses async generators, which need Python 3.6
+if sys.version_info >= (3, 6):
+    _modules.append('tvdb_async')
+    _extras['async'] = ['aiohttp']
 
 
 setup(
@@ -50,6 +56,7 @@ u'Stole a Badge'
 
 py_modules = _modules,
 install_requires = _requirements,
+extras_require = _extras,
 
 tests_require=['pytest'],
 cmdclass = {'test': PyTest},
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+#encoding:utf-8
+#author:dbr/Ben
+#project:tvdb_api
+#repository:http://github.com/dbr/tvdb_api
+#license:unlicense (http://unlicense.org/)
+
+"""Shared test setup: FakeTvdb, a local stub of the thetvdb.com API
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import hashlib
+import threading
+import pytest
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+# Force parent directory onto path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tvdb_api
+
+
+# tvdb_async uses syntax (async generators) which needs Python 3.6
+collect_ignore = []
+if sys.version_info < (3, 6):
+    collect_ignore.append('test_tvdb_async.py')
+
+
+def fake_token(expires_in=24 * 60 * 60):
+    """Returns a JSON Web Token like the ones thetvdb.com hands out
+    """
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii').rstrip('=')
+    fake_token.count += 1
+    return '.'.join([
+        encode({'alg': 'RS256', 'typ': 'JWT'}),
+        encode({'exp': int(time.time() + expires_in), 'id': 'tvdb_api', 'n': fake_token.count}),
+        'signature'])
+fake_token.count = 0
+
+
+class FakeTvdbHandler(BaseHTTPRequestHandler):
+    """Answers requests from the routes of the FakeTvdb server
+    """
+    def _reply(self):
+        # Python 2 gives the header names in lower case
+        headers = tvdb_api.requests.structures.CaseInsensitiveDict(self.headers.items())
+        self.server.requests.append((self.command, self.path, headers))
+        status, payload = self.server.routes.get(
+            (self.command, self.path),
+            self.server.routes.get(
+                (self.command, self.path.split('?')[0] + '?*'),
+                (404, {'Error': 'Resource not found'})))
+        if self.headers.get('Authorization') in self.server.revoked_tokens:
+            status, payload = 401, {'Error': 'Not authorized'}
+        if callable(payload):
+            payload = payload(self)
+            if isinstance(payload, tuple):
+                status, payload = payload
+        body = json.dumps(payload, sort_keys=True).encode('utf-8')
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if status == 200 and self.server.etags and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if status == 200 and self.server.etags:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        self._reply()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTvdb(ThreadingMixIn, HTTPServer):
+    """Local stand-in for api.thetvdb.com, so tests can run without
+    network access. Routes map (method, path) to (status, payload),
+    payload can be a callable returning the payload or (status, payload).
+    A path ending in ?* matches any query
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), FakeTvdbHandler)
+        self.url = 'http://127.0.0.1:%d' % self.server_port
+        self.requests = []
+        # Authorization headers which get a 401 response
+        self.revoked_tokens = set()
+        # send ETags and answer matching If-None-Match with 304
+        self.etags = False
+        self.routes = {
+            ('POST', '/login'): (200, lambda handler: {'token': fake_token()}),
+            ('GET', '/refresh_token'): (200, lambda handler: {'token': fake_token()}),
+        }
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def paths(self, method='GET'):
+        return [path for (m, path, headers) in self.requests if m == method]
+
+    def add_show(self, sid, name, seasons, page_size=100):
+        """Adds routes for a show with seasons, a dict mapping season
+        number to number of episodes, its episodes split into pages of
+        page_size
+        """
+        self.routes[('GET', '/search/series?name=%s' % name.replace(' ', '%20'))] = (
+            200, {'data': [{'id': sid, 'seriesName': name}]})
+        self.routes[('GET', '/series/%s' % sid)] = (
+            200, {'data': {'id': sid, 'seriesName': name, 'status': 'Ended'}})
+
+        episodes = []
+        for seas_no in sorted(seasons):
+            for ep_no in range(1, seasons[seas_no] + 1):
+                episodes.append({
+                    'id': sid * 10000 + seas_no * 100 + ep_no,
+                    'airedSeason': seas_no,
+                    'airedEpisodeNumber': ep_no,
+                    'dvdSeason': None,
+                    'dvdEpisodeNumber': None,
+                    'episodeName': 'Episode %dx%d' % (seas_no, ep_no),
+                })
+
+        self.routes[('GET', '/series/%s/actors' % sid)] = (
+            200, {'data': [{'id': 1, 'name': 'Actor One', 'image': 'actors/1.jpg', 'role': 'Lead'}]})
+        self.routes[('GET', '/series/%s/images' % sid)] = (
+            200, {'data': {'poster': 1, 'fanart': 1}})
+        for key_type in ['poster', 'fanart']:
+            self.routes[('GET', '/series/%s/images/query?keyType=%s' % (sid, key_type))] = (
+                200, {'data': [{'id': 1, 'keyType': key_type, 'resolution': '680x1000',
+                                'fileName': '%ss/%s-1.jpg' % (key_type, sid), 'subKey': ''}]})
+
+        for seas_no in seasons:
+            season_episodes = [ep for ep in episodes if ep['airedSeason'] == seas_no]
+            self.routes[('GET', '/series/%s/episodes/query?airedSeason=%s' % (sid, seas_no))] = (
+                200, {'data': season_episodes, 'links': {'first': 1, 'last': 1, 'next': None, 'prev': None}})
+
+        self.routes[('GET', '/series/%s/episodes/summary' % sid)] = (
+            200, {'data': {'airedSeasons': [str(seas_no) for seas_no in seasons],
+                           'airedEpisodes': str(len(episodes)),
+                           'dvdSeasons': [],
+                           'dvdEpisodes': '0'}})
+
+        pages = [episodes[i:i + page_size] for i in range(0, len(episodes), page_size)] or [[]]
+        for page, page_data in enumerate(pages, 1):
+            links = {
+                'first': 1,
+                'last': len(pages),
+                'next': page + 1 if page < len(pages) else None,
+                'prev': page - 1 if page > 1 else None,
+            }
+            payload = (200, {'data': page_data, 'links': links})
+            self.routes[('GET', '/series/%s/episodes?page=%s' % (sid, page))] = payload
+            if page == 1:
+                self.routes[('GET', '/series/%s/episodes' % sid)] = payload
+        return episodes
+
+    def tvdb(self, tvdb_class=tvdb_api.Tvdb, **kwargs):
+        """Returns a Tvdb (or tvdb_class) instance which talks to this server
+        """
+        kwargs.setdefault('cache', False)
+        t = tvdb_class(**kwargs)
+        for key, value in list(t.config.items()):
+            if key.startswith('url_') and value.startswith(t.config['api_url']):
+                t.config[key] = value.replace(t.config['api_url'], self.url, 1)
+        t.config['api_url'] = self.url
+        return t
+
+
+@pytest.fixture
+def fake_tvdb(monkeypatch):
+    # failures of earlier tests must not leave the shared breaker open
+    monkeypatch.setattr(tvdb_api, 'circuit_breaker', tvdb_api.CircuitBreaker())
+    monkeypatch.setattr(tvdb_api, 'response_cache', tvdb_api.ResponseCache())
+    server = FakeTvdb()
+    yield server
+    server.stop()
@@ -10,7 +10,10 @@
 
 import os
 import sys
+import json
+import time
 import datetime
+import threading
 import pytest
 
 # Force parent directory onto path
@@ -20,6 +23,8 @@ import tvdb_api
 from tvdb_api import (tvdb_shownotfound, tvdb_seasonnotfound,
                       tvdb_episodenotfound, tvdb_attributenotfound)
 
+from conftest import fake_token
+
 
 class TestTvdbBasic:
     # Used to store the cached instance of Tvdb()
@@ -447,5 +452,1387 @@ class TestTvdbAltNames:
         series = results[0]
         assert 'Apartment 23' in series['aliases']
 
+class TestTvdbPagination:
+    def test_all_pages_joined_in_order(self, fake_tvdb):
+        """Checks every episode page is loaded and combined in page order
+        """
+        episodes = fake_tvdb.add_show(1, 'Long Show', {1: 10, 2: 10, 3: 5}, page_size=4)
+        t = fake_tvdb.tvdb(workers=4)
+
+        data = t._loadUrl(t.config['url_epInfo'] % 1)
+
+        assert [ep['id'] for ep in data] == [ep['id'] for ep in episodes]
+        assert sorted(fake_tvdb.paths()) == sorted(
+            ['/series/1/episodes'] + ['/series/1/episodes?page=%d' % p for p in range(2, 8)])
+        assert fake_tvdb.paths('POST') == ['/login']
+
+    def test_show_built_from_all_pages(self, fake_tvdb):
+        """Checks a show spread over several pages is fully built
+        """
+        fake_tvdb.add_show(1, 'Long Show', {1: 10, 2: 10, 3: 5}, page_size=4)
+        show = fake_tvdb.tvdb(workers=1)[1]
+
+        assert len(show) == 3
+        assert len(show[2]) == 10
+        assert show[3][5]['episodeName'] == 'Episode 3x5'
+
+    def test_page_url_keeps_query(self):
+        """Checks the page parameter is added next to existing parameters
+        """
+        assert tvdb_api._pageUrl('http://x/a', 2) == 'http://x/a?page=2'
+        assert tvdb_api._pageUrl('http://x/a?b=1&page=2', 3) == 'http://x/a?b=1&page=3'
+
+
+class TestTvdbIterEpisodes:
+    def test_yields_all_episodes(self, fake_tvdb):
+        """Checks every episode is yielded, in order
+        """
+        episodes = fake_tvdb.add_show(1, 'Long Show', {1: 10, 2: 10, 3: 5}, page_size=4)
+        t = fake_tvdb.tvdb()
+
+        eps = list(t.iter_episodes(1))
+
+        assert [ep['id'] for ep in eps] == [ep['id'] for ep in episodes]
+        assert isinstance(eps[0], tvdb_api.Episode)
+        assert t.shows == {}
+
+    def test_stop_early(self, fake_tvdb):
+        """Checks pages after the one containing the wanted episode are not
+        requested
+        """
+        fake_tvdb.add_show(1, 'Long Show', {1: 10, 2: 10, 3: 5}, page_size=4)
+        t = fake_tvdb.tvdb()
+
+        for ep in t.iter_episodes(1):
+            if ep['episodeName'] == 'Episode 1x6':
+                break
+
+        assert fake_tvdb.paths() == ['/series/1/episodes', '/series/1/episodes?page=2']
+
+
+class TestTvdbShowDataFanOut:
+    def test_requests_made_concurrently(self, fake_tvdb):
+        """Checks series info and episodes are requested at the same time
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        in_flight = [0]
+        most_in_flight = [0]
+        lock = threading.Lock()
+
+        def slow(payload):
+            def respond(handler):
+                with lock:
+                    in_flight[0] += 1
+                    most_in_flight[0] = max(most_in_flight[0], in_flight[0])
+                time.sleep(0.2)
+                with lock:
+                    in_flight[0] -= 1
+                return payload
+            return respond
+
+        for key, (status, payload) in list(fake_tvdb.routes.items()):
+            if key[0] == 'GET':
+                fake_tvdb.routes[key] = (status, slow(payload))
+
+        show = fake_tvdb.tvdb(workers=4)[1]
+
+        assert most_in_flight[0] == 2
+        assert show['seriesName'] == 'Fake Show'
+        assert show[1][3]['episodeName'] == 'Episode 1x3'
+
+    def test_missing_show_not_added(self, fake_tvdb):
+        """Checks a failed lookup leaves no partial show behind
+        """
+        fake_tvdb.routes[('GET', '/series/2')] = (404, {'Error': 'ID: 2 not found'})
+        t = fake_tvdb.tvdb(banners=True, actors=True)
+
+        with pytest.raises(tvdb_shownotfound):
+            t[2]
+        assert 2 not in t.shows
+
+
+class TestTvdbLazyBannersActors:
+    def test_loaded_on_first_access(self, fake_tvdb):
+        """Checks banners and actors are only requested when accessed,
+        and only once
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        show = fake_tvdb.tvdb(banners=True, actors=True)[1]
+
+        assert not [p for p in fake_tvdb.paths() if '/images' in p or '/actors' in p]
+        assert '_banners' in show.data
+
+        assert show['_actors'][0]['name'] == 'Actor One'
+        assert show['_actors'][0]['image'].endswith('/banners/actors/1.jpg')
+        assert sorted(show['_banners'].keys()) == ['fanart', 'poster']
+        assert show['_banners']['poster']['680x1000'][1]['_bannerpath'].endswith('/banners/posters/1-1.jpg')
+
+        assert fake_tvdb.paths().count('/series/1/actors') == 1
+        assert fake_tvdb.paths().count('/series/1/images') == 1
+        assert isinstance(show.data['_actors'], tvdb_api.Actors)
+
+
+class TestTvdbLazySeasons:
+    def test_season_loaded_on_access(self, fake_tvdb):
+        """Checks only the accessed season is requested
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 4, 2: 3, 3: 5}, page_size=2)
+        show = fake_tvdb.tvdb(lazy_seasons=True)[1]
+
+        assert fake_tvdb.paths() == ['/series/1']
+
+        assert show[2][3]['episodeName'] == 'Episode 2x3'
+        assert show[2][1]['episodeName'] == 'Episode 2x1'
+        assert list(dict.keys(show)) == [2]
+        assert fake_tvdb.paths() == ['/series/1', '/series/1/episodes/query?airedSeason=2']
+
+    def test_missing_season(self, fake_tvdb):
+        """Checks a season which does not exist is only requested once
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 4})
+        show = fake_tvdb.tvdb(lazy_seasons=True)[1]
+
+        for attempt in range(2):
+            with pytest.raises(tvdb_seasonnotfound):
+                show[9]
+        assert fake_tvdb.paths().count('/series/1/episodes/query?airedSeason=9') == 1
+
+    def test_iterating_loads_all(self, fake_tvdb):
+        """Checks iterating, len() and searching load every season
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 4, 2: 3, 3: 5}, page_size=2)
+        show = fake_tvdb.tvdb(lazy_seasons=True)[1]
+        show[1]
+
+        assert len(show) == 3
+        assert sorted(show.keys()) == [1, 2, 3]
+        assert len(show.search('Episode 3x')) == 5
+        assert fake_tvdb.paths().count('/series/1/episodes') == 1
+
+
+class TestTvdbSummary:
+    def test_has_season_without_loading(self, fake_tvdb):
+        """Checks has_season uses the summary instead of requesting episodes
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 4, 2: 3, 3: 5})
+        show = fake_tvdb.tvdb(lazy_seasons=True)[1]
+
+        assert show.has_season(3)
+        assert not show.has_season(7)
+        assert show.summary()['airedEpisodes'] == '12'
+        assert fake_tvdb.paths() == ['/series/1', '/series/1/episodes/summary']
+        assert dict.__len__(show) == 0
+
+    def test_has_season_loaded_show(self, fake_tvdb):
+        """Checks a fully loaded show answers from its own seasons
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 4, 2: 3})
+        show = fake_tvdb.tvdb()[1]
+
+        assert show.has_season(2)
+        assert not show.has_season(3)
+        assert '/series/1/episodes/summary' not in fake_tvdb.paths()
+
+
+class TestTvdbTokenCache:
+    def test_token_reused_by_later_instance(self, fake_tvdb, tmpdir):
+        """Checks a second instance using the same cache directory does not
+        log in again
+        """
+        fake_tvdb.add_show(1, 'First Show', {1: 2})
+        fake_tvdb.add_show(2, 'Second Show', {1: 2})
+
+        first = fake_tvdb.tvdb(cache=str(tmpdir))
+        first[1]
+        assert fake_tvdb.paths('POST') == ['/login']
+        assert os.path.exists(first.config['cache_location'] + '.token')
+
+        second = fake_tvdb.tvdb(cache=str(tmpdir))
+        second[2]
+        assert fake_tvdb.paths('POST') == ['/login']
+        assert second.headers['Authorization'] == first.headers['Authorization']
+
+    def test_other_credentials_log_in(self, fake_tvdb, tmpdir):
+        """Checks a stored token is only used for the same credentials
+        """
+        fake_tvdb.add_show(1, 'First Show', {1: 2})
+        fake_tvdb.add_show(2, 'Second Show', {1: 2})
+
+        fake_tvdb.tvdb(cache=str(tmpdir))[1]
+        fake_tvdb.tvdb(cache=str(tmpdir), apikey='a', username='b', userkey='c')[2]
+        assert fake_tvdb.paths('POST') == ['/login', '/login']
+
+    def test_expiring_token_refreshed(self, fake_tvdb, tmpdir):
+        """Checks a token about to expire is refreshed before the next
+        request, rather than logging in again
+        """
+        fake_tvdb.add_show(1, 'First Show', {1: 2})
+        fake_tvdb.add_show(2, 'Second Show', {1: 2})
+        fake_tvdb.routes[('POST', '/login')] = (200, lambda handler: {'token': fake_token(expires_in=60)})
+
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        t[1]
+        old_token = t.headers['Authorization']
+        t[2]
+
+        assert fake_tvdb.paths('POST') == ['/login']
+        assert fake_tvdb.paths().count('/refresh_token') == 1
+        assert t.headers['Authorization'] != old_token
+        assert fake_tvdb.requests[-1][2]['Authorization'] == t.headers['Authorization']
+
+    def test_refresh_leaves_cache_enabled(self, fake_tvdb, tmpdir):
+        """Checks refreshing the token neither disables the cache shared
+        with other threads nor caches the refresh response
+        """
+        fake_tvdb.add_show(1, 'First Show', {1: 2})
+        fake_tvdb.routes[('POST', '/login')] = (200, lambda handler: {'token': fake_token(expires_in=60)})
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        t[1]
+
+        def cache_disabled():
+            raise AssertionError("cache disabled")
+        t.session.cache_disabled = cache_disabled
+        t._refreshToken()
+        t._refreshToken()
+
+        assert fake_tvdb.paths().count('/refresh_token') == 2
+        assert fake_tvdb.paths('POST') == ['/login']
+
+
+class TestTvdbReauthorize:
+    def test_revoked_token_replaced(self, fake_tvdb):
+        """Checks a request failing with 401 gets a new token and is retried
+        """
+        fake_tvdb.add_show(1, 'First Show', {1: 2})
+        fake_tvdb.add_show(2, 'Second Show', {1: 2})
+        t = fake_tvdb.tvdb()
+        t[1]
+
+        fake_tvdb.revoked_tokens.add(t.headers['Authorization'])
+        assert t[2][1][2]['episodeName'] == 'Episode 1x2'
+        assert fake_tvdb.paths('POST') == ['/login', '/login']
+
+    def test_concurrent_requests_share_reauthorization(self, fake_tvdb):
+        """Checks pages failing at the same time only log in once
+        """
+        fake_tvdb.add_show(1, 'Long Show', {1: 10, 2: 10}, page_size=3)
+        status, first_page = fake_tvdb.routes[('GET', '/series/1/episodes')]
+
+        def revoke_after_first_page(handler):
+            fake_tvdb.revoked_tokens.add(handler.headers['Authorization'])
+            return first_page
+        fake_tvdb.routes[('GET', '/series/1/episodes')] = (status, revoke_after_first_page)
+
+        t = fake_tvdb.tvdb(workers=4)
+        data = t._loadUrl(t.config['url_epInfo'] % 1)
+
+        assert len(data) == 20
+        assert fake_tvdb.paths('POST') == ['/login', '/login']
+        assert fake_tvdb.paths().count('/refresh_token') == 0
+
+    def test_revoked_stored_token_replaced(self, fake_tvdb, tmpdir):
+        """Checks a revoked token stored in the cache directory is not
+        used again, by this or later instances
+        """
+        fake_tvdb.add_show(1, 'First Show', {1: 2})
+        fake_tvdb.add_show(2, 'Second Show', {1: 2})
+        fake_tvdb.add_show(3, 'Third Show', {1: 2})
+        first = fake_tvdb.tvdb(cache=str(tmpdir))
+        first[1]
+        revoked = first.headers['Authorization']
+        fake_tvdb.revoked_tokens.add(revoked)
+
+        # not logged in yet, as when every page so far was cached
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        t._reauthorize(t._tokenGeneration)
+        assert t.headers['Authorization'] != revoked
+        assert t[2][1][2]['episodeName'] == 'Episode 1x2'
+        assert fake_tvdb.paths('POST') == ['/login', '/login']
+
+        later = fake_tvdb.tvdb(cache=str(tmpdir))
+        later[3]
+        assert later.headers['Authorization'] == t.headers['Authorization']
+        assert fake_tvdb.paths('POST') == ['/login', '/login']
+
+
+class CountingRateLimiter(tvdb_api.RateLimiter):
+    def __init__(self, *args, **kwargs):
+        tvdb_api.RateLimiter.__init__(self, *args, **kwargs)
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        tvdb_api.RateLimiter.acquire(self)
+
+
+class TestTvdbRateLimit:
+    def test_rate(self):
+        """Checks requests after the burst are spaced out
+        """
+        limiter = tvdb_api.RateLimiter(rate=50, burst=2)
+        start = time.time()
+        for i in range(7):
+            limiter.acquire()
+        assert time.time() - start >= 0.09
+
+    def test_unlimited(self):
+        limiter = tvdb_api.RateLimiter()
+        start = time.time()
+        for i in range(1000):
+            limiter.acquire()
+        assert time.time() - start < 0.5
+
+    def test_same_limit_keeps_tokens(self):
+        """Checks configuring the limit again does not refill the bucket
+        """
+        limiter = tvdb_api.RateLimiter(rate=1, burst=2)
+        limiter.acquire()
+        limiter.acquire()
+        limiter.configure(1, 2)
+        assert limiter._reserve() is not None
+
+        limiter.configure(1, 3)
+        assert limiter._reserve() is None
+
+    def test_deadline(self):
+        """Checks waiting past the deadline of the thread fails at once
+        """
+        limiter = tvdb_api.RateLimiter(rate=0.5, burst=1)
+        limiter.acquire()
+        tvdb_api._local.deadline = time.time() + 0.5
+        try:
+            start = time.time()
+            with pytest.raises(tvdb_api.tvdb_deadlineexceeded):
+                limiter.acquire()
+            assert time.time() - start < 0.1
+        finally:
+            tvdb_api._local.deadline = None
+
+    def test_cache_hits_not_limited(self, fake_tvdb, tmpdir, monkeypatch):
+        """Checks only requests which reach the server count against the
+        shared limit
+        """
+        limiter = CountingRateLimiter()
+        monkeypatch.setattr(tvdb_api, 'rate_limiter', limiter)
+        fake_tvdb.add_show(1, 'Fake Show', {1: 10}, page_size=3)
+
+        fake_tvdb.tvdb(cache=str(tmpdir))[1]
+        assert limiter.acquired == len(fake_tvdb.requests)
+
+        fake_tvdb.tvdb(cache=str(tmpdir))[1]
+        assert limiter.acquired == len(fake_tvdb.requests)
+
+    def test_configured_by_tvdb(self, monkeypatch):
+        limiter = tvdb_api.RateLimiter()
+        monkeypatch.setattr(tvdb_api, 'rate_limiter', limiter)
+        tvdb_api.Tvdb(cache=False, rate_limit=3, rate_burst=5)
+        assert (limiter.rate, limiter.burst) == (3, 5)
+
+
+class TestTvdbCircuitBreaker:
+    @pytest.fixture(autouse=True)
+    def breaker(self, fake_tvdb, monkeypatch):
+        breaker = tvdb_api.CircuitBreaker(failure_threshold=2, reset_timeout=0.5)
+        monkeypatch.setattr(tvdb_api, 'circuit_breaker', breaker)
+        return breaker
+
+    def test_retries_server_errors(self, fake_tvdb):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 2})
+        responses = [(503, {'Error': 'Unavailable'}), (502, {'Error': 'Bad Gateway'})]
+        series = fake_tvdb.routes[('GET', '/series/1')][1]
+        fake_tvdb.routes[('GET', '/series/1')] = (
+            200, lambda handler: responses.pop(0) if responses else series)
+
+        t = fake_tvdb.tvdb(retry_backoff=0.01)
+        assert t[1]['seriesName'] == 'Fake Show'
+        assert fake_tvdb.paths().count('/series/1') == 3
+
+    def test_gives_up_after_retries(self, fake_tvdb):
+        fake_tvdb.routes[('GET', '/series/1')] = (500, {'Error': 'Internal Server Error'})
+        t = fake_tvdb.tvdb(retries=2, retry_backoff=0.01)
+        with pytest.raises(tvdb_api.tvdb_error):
+            t[1]
+        assert fake_tvdb.paths().count('/series/1') == 3
+
+    def test_connection_error(self, fake_tvdb):
+        fake_tvdb.stop()
+        t = fake_tvdb.tvdb(retries=1, retry_backoff=0.01)
+        with pytest.raises(tvdb_api.tvdb_error):
+            t[1]
+
+    def test_opens_and_probes(self, fake_tvdb, breaker):
+        """Checks the breaker fails fast once open, then lets a single
+        request through after reset_timeout
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 2})
+        series = fake_tvdb.routes[('GET', '/series/1')]
+        fake_tvdb.routes[('GET', '/series/1')] = (503, {'Error': 'Unavailable'})
+        # only requests the series information, one request per lookup
+        t = fake_tvdb.tvdb(retries=0, lazy_seasons=True)
+
+        for i in range(2):
+            with pytest.raises(tvdb_api.tvdb_error):
+                t[1]
+        assert breaker.state == 'open'
+
+        count = len(fake_tvdb.requests)
+        with pytest.raises(tvdb_api.tvdb_error):
+            t[1]
+        assert len(fake_tvdb.requests) == count
+
+        time.sleep(0.5)
+        assert breaker.state == 'half-open'
+        fake_tvdb.routes[('GET', '/series/1')] = series
+        assert t[1]['seriesName'] == 'Fake Show'
+        assert breaker.state == 'closed'
+
+    def test_probe_token(self, breaker):
+        """Checks only the probe's own token lets another probe through
+        """
+        for i in range(2):
+            breaker.failure()
+        time.sleep(0.5)
+        probe = breaker.allow()
+        assert probe is not None
+        assert breaker.allow() is None
+
+        breaker.release(object())
+        assert breaker.allow() is None
+        breaker.release(probe)
+        assert breaker.allow() is not None
+
+    def test_unexpected_error_in_probe(self, fake_tvdb, breaker, monkeypatch):
+        """Checks an unexpected exception from the probe counts as a
+        failure instead of leaving the breaker half-open for good
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 2})
+        for i in range(2):
+            breaker.failure()
+        time.sleep(0.5)
+
+        send = tvdb_api.TvdbAdapter._send
+        errors = [tvdb_api.requests.exceptions.ChunkedEncodingError("broken")]
+
+        def broken(self, request, **kwargs):
+            if errors:
+                raise errors.pop()
+            return send(self, request, **kwargs)
+        monkeypatch.setattr(tvdb_api.TvdbAdapter, '_send', broken)
+        with pytest.raises(tvdb_api.requests.exceptions.ChunkedEncodingError):
+            fake_tvdb.tvdb(lazy_seasons=True)[1]
+        assert breaker.state == 'open'
+
+        time.sleep(0.5)
+        assert fake_tvdb.tvdb(lazy_seasons=True)[1]['seriesName'] == 'Fake Show'
+        assert breaker.state == 'closed'
+
+    def test_configure_keeps_state(self, fake_tvdb, breaker):
+        """Checks creating an instance with breaker settings does not close
+        the breaker shared by the process
+        """
+        for i in range(2):
+            breaker.failure()
+        fake_tvdb.tvdb(breaker_threshold=2)
+        assert breaker.state == 'open'
+
+        fake_tvdb.tvdb(breaker_threshold=3, breaker_reset=0.5)
+        assert breaker.state == 'open'
+        assert breaker.failure_threshold == 3
+
+    def test_force_connect(self, fake_tvdb, breaker):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 2})
+        for i in range(2):
+            breaker.failure()
+        with pytest.raises(tvdb_api.tvdb_error):
+            fake_tvdb.tvdb()[1]
+        assert fake_tvdb.tvdb(forceConnect=True)[1]['seriesName'] == 'Fake Show'
+
+
+def slow(route, seconds):
+    """Returns route with a payload which is sent after a delay
+    """
+    status, payload = route
+
+    def delayed(handler):
+        time.sleep(seconds)
+        return payload(handler) if callable(payload) else payload
+    return status, delayed
+
+
+class TestTvdbDeadline:
+    def test_read_timeout(self, fake_tvdb):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 2})
+        fake_tvdb.routes[('GET', '/series/1')] = slow(fake_tvdb.routes[('GET', '/series/1')], 1)
+        t = fake_tvdb.tvdb(read_timeout=0.2, retries=0)
+        start = time.time()
+        with pytest.raises(tvdb_api.tvdb_error):
+            t[1]
+        assert time.time() - start < 0.9
+
+    def test_deadline_exceeded(self, fake_tvdb):
+        """Checks the deadline covers every page of the episodes, which
+        are loaded by worker threads
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 10}, page_size=2)
+        for key in list(fake_tvdb.routes):
+            if key[1].startswith('/series/1/episodes?page='):
+                fake_tvdb.routes[key] = slow(fake_tvdb.routes[key], 0.3)
+
+        t = fake_tvdb.tvdb(workers=2)
+        start = time.time()
+        with pytest.raises(tvdb_api.tvdb_deadlineexceeded):
+            t.get('Fake Show', deadline=0.5)
+        assert time.time() - start < 0.9
+        assert tvdb_api._deadline() is None
+
+    def test_within_deadline(self, fake_tvdb):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 10}, page_size=2)
+        t = fake_tvdb.tvdb()
+        show = t.get('Fake Show', deadline=5)
+        assert len(show[1]) == 10
+        assert tvdb_api._deadline() is None
+
+
+class TestTvdbSingleFlight:
+    def lookup_concurrently(self, t, keys):
+        results = [None] * len(keys)
+
+        def lookup(i):
+            try:
+                results[i] = t[keys[i]]
+            except Exception as e:
+                results[i] = e
+        threads = [threading.Thread(target=lookup, args=(i,)) for i in range(len(keys))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_same_name(self, fake_tvdb):
+        """Checks threads looking up the same show at once share a single
+        search and download
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        search = ('GET', '/search/series?name=Fake%20Show')
+        fake_tvdb.routes[search] = slow(fake_tvdb.routes[search], 0.3)
+
+        t = fake_tvdb.tvdb()
+        results = self.lookup_concurrently(t, ['Fake Show'] * 6 + ['fake show ', 'FAKE SHOW'])
+        assert all(show is t.shows[1] for show in results)
+        assert fake_tvdb.paths().count('/search/series?name=Fake%20Show') == 1
+        assert fake_tvdb.paths().count('/series/1') == 1
+        assert fake_tvdb.paths().count('/series/1/episodes') == 1
+        assert t.corrections['FAKE SHOW'] == 1
+
+    def test_same_sid(self, fake_tvdb):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.routes[('GET', '/series/1')] = slow(fake_tvdb.routes[('GET', '/series/1')], 0.3)
+
+        t = fake_tvdb.tvdb()
+        results = self.lookup_concurrently(t, [1] * 6)
+        assert all(show is t.shows[1] for show in results)
+        assert fake_tvdb.paths().count('/series/1') == 1
+
+    def test_shared_error(self, fake_tvdb):
+        search = ('GET', '/search/series?name=Missing')
+        fake_tvdb.routes[search] = slow((404, {'Error': 'Resource not found'}), 0.3)
+
+        results = self.lookup_concurrently(fake_tvdb.tvdb(), ['Missing'] * 4)
+        assert all(isinstance(e, tvdb_shownotfound) for e in results)
+        assert fake_tvdb.paths().count('/search/series?name=Missing') == 1
+
+    def test_leader_deadline_not_shared(self, fake_tvdb):
+        """Checks threads without a deadline do not fail when the thread
+        loading the show for them runs out of time
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.routes[('GET', '/series/1')] = slow(fake_tvdb.routes[('GET', '/series/1')], 0.5)
+        t = fake_tvdb.tvdb()
+        results = {}
+
+        def lookup(name, deadline):
+            try:
+                results[name] = t.get(1, deadline=deadline)
+            except Exception as e:
+                results[name] = e
+        leader = threading.Thread(target=lookup, args=('leader', 0.2))
+        leader.start()
+        time.sleep(0.1)
+        waiter = threading.Thread(target=lookup, args=('waiter', None))
+        waiter.start()
+        leader.join()
+        waiter.join()
+
+        assert isinstance(results['leader'], tvdb_api.tvdb_deadlineexceeded)
+        assert results['waiter']['seriesName'] == 'Fake Show'
+
+
+class TestTvdbThreadSafety:
+    def test_request_languages(self, fake_tvdb):
+        """Checks threads requesting different languages from one
+        instance each send their own Accept-Language header
+        """
+        languages = ['en', 'de', 'fr', 'nl', 'sv', 'ja'] * 5
+        for i in range(len(languages)):
+            fake_tvdb.routes[('GET', '/language/%d' % i)] = (
+                200, lambda handler: {'data': handler.headers['Accept-Language']})
+
+        t = fake_tvdb.tvdb()
+        results = [None] * len(languages)
+
+        def load(i):
+            results[i] = t._getetsrc('%s/language/%d' % (fake_tvdb.url, i), language=languages[i])
+        threads = [threading.Thread(target=load, args=(i,)) for i in range(len(languages))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == languages
+        assert 'Accept-Language' in t.headers and t.headers['Accept-Language'] == 'en'
+
+    def test_show_installed_when_built(self, fake_tvdb):
+        """Checks other threads only see a show once it is complete
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 5, 2: 5}, page_size=2)
+        for key in list(fake_tvdb.routes):
+            if key[1].startswith('/series/1/episodes?page='):
+                fake_tvdb.routes[key] = slow(fake_tvdb.routes[key], 0.1)
+
+        t = fake_tvdb.tvdb(workers=1)
+        seen = []
+        loader = threading.Thread(target=lambda: t[1])
+        loader.start()
+        while loader.is_alive():
+            show = t.shows.get(1)
+            if show is not None:
+                seen.append(sum(dict.__len__(season) for season in dict.values(show)))
+        loader.join()
+        assert set(seen) <= set([10])
+        assert len(t[1][2]) == 5
+
+
+class TestTvdbSync:
+    def test_invalidates_changed_series(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3, 2: 3})
+        fake_tvdb.add_show(2, 'Other Show', {1: 3})
+        fake_tvdb.routes[('GET', '/updated/query?*')] = (
+            200, {'data': [{'id': 1, 'lastUpdated': int(time.time())}]})
+
+        t = fake_tvdb.tvdb(cache=str(tmpdir), banners=True, lazy_seasons=True)
+        for sid in [1, 2]:
+            show = t[sid]
+            show['_banners']
+            show.summary()
+            show[1]
+        show.keys()
+        assert t.sync() == []
+        assert tmpdir.join('tvdb_api.sync').check()
+
+        assert t.sync(since=time.time() - 3600) == [1]
+        assert 1 not in t.shows and 2 in t.shows
+
+        del fake_tvdb.requests[:]
+        t = fake_tvdb.tvdb(cache=str(tmpdir), banners=True, lazy_seasons=True)
+        for sid in [1, 2]:
+            show = t[sid]
+            show['_banners']
+            show.summary()
+            show[1]
+        assert set(fake_tvdb.paths()) == set([
+            '/series/1', '/series/1/images', '/series/1/images/query?keyType=poster',
+            '/series/1/images/query?keyType=fanart', '/series/1/episodes/summary',
+            '/series/1/episodes/query?airedSeason=1'])
+
+    def test_skips_uncached_series(self, fake_tvdb, tmpdir):
+        """Checks series which were never looked up are not searched for
+        in the cache
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.routes[('GET', '/updated/query?*')] = (
+            200, {'data': [{'id': sid, 'lastUpdated': int(time.time())} for sid in range(1, 501)]})
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        t[1]
+        deleted = []
+        delete_cached = t._deleteCached
+
+        def counting_delete(url, language):
+            deleted.append(url)
+            return delete_cached(url, language)
+        t._deleteCached = counting_delete
+
+        start = time.time()
+        assert len(t.sync(since=time.time() - 3600)) == 500
+        assert time.time() - start < 5
+        assert deleted and all('/series/1/' in url or url.endswith('/series/1') for url in deleted)
+        assert 1 not in t.shows
+
+    def test_uses_stored_time(self, fake_tvdb, tmpdir):
+        fake_tvdb.routes[('GET', '/updated/query?*')] = (200, {'data': []})
+        since = int(time.time()) - 10 * 24 * 60 * 60
+        tmpdir.join('tvdb_api.sync').write(json.dumps({'lastSync': since}))
+
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        assert t.sync() == []
+        paths = [path for path in fake_tvdb.paths() if path.startswith('/updated/query')]
+        # more than a week is requested a week at a time
+        assert len(paths) == 2
+        assert paths[0].startswith('/updated/query?fromTime=%d&toTime=%d' % (since, since + 7 * 24 * 60 * 60))
+        assert json.loads(tmpdir.join('tvdb_api.sync').read())['lastSync'] > since
+
+
+def expire_cache(t):
+    """Makes every cached response of t expired
+    """
+    t.config['cache_ttl'] = dict((name, 0) for name in t.config['cache_ttl'])
+
+
+class TestTvdbRevalidation:
+    def test_not_modified(self, fake_tvdb, tmpdir):
+        """Checks an expired response is revalidated, and kept when the
+        server answers 304
+        """
+        fake_tvdb.etags = True
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.tvdb(cache=str(tmpdir))[1]
+
+        del fake_tvdb.requests[:]
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        expire_cache(t)
+        assert t[1][1][3]['episodeName'] == 'Episode 1x3'
+        headers = dict((path, h) for (m, path, h) in fake_tvdb.requests)
+        assert headers['/series/1'].get('If-None-Match')
+
+        # the renewed responses are fresh again
+        del fake_tvdb.requests[:]
+        fake_tvdb.tvdb(cache=str(tmpdir))[1]
+        assert fake_tvdb.requests == []
+
+    def test_modified(self, fake_tvdb, tmpdir):
+        fake_tvdb.etags = True
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        t[1]
+
+        fake_tvdb.routes[('GET', '/series/1')] = (
+            200, {'data': {'id': 1, 'seriesName': 'Renamed Show', 'status': 'Ended'}})
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        expire_cache(t)
+        assert t[1]['seriesName'] == 'Renamed Show'
+
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        assert t[1]['seriesName'] == 'Renamed Show'
+
+
+class TestTvdbStaleWhileRevalidate:
+    def wait_for_refresh(self, t):
+        for i in range(100):
+            if not t.session._refreshing:
+                return
+            time.sleep(0.05)
+
+    def test_serves_stale(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.tvdb(cache=str(tmpdir))[1]
+
+        fake_tvdb.routes[('GET', '/series/1')] = slow(
+            (200, {'data': {'id': 1, 'seriesName': 'Renamed Show', 'status': 'Ended'}}), 0.5)
+        t = fake_tvdb.tvdb(cache=str(tmpdir), stale_while_revalidate=3600)
+        expire_cache(t)
+
+        start = time.time()
+        assert t[1]['seriesName'] == 'Fake Show'
+        assert time.time() - start < 0.4
+
+        self.wait_for_refresh(t)
+        assert fake_tvdb.paths().count('/series/1') == 2
+        assert fake_tvdb.tvdb(cache=str(tmpdir))[1]['seriesName'] == 'Renamed Show'
+
+    def test_bounded_threads(self, fake_tvdb, tmpdir, monkeypatch):
+        """Checks stale responses are refreshed by at most workers threads
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 20}, page_size=2)
+        fake_tvdb.tvdb(cache=str(tmpdir), cache_shows=False)[1]
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_shows=False, stale_while_revalidate=3600, workers=2)
+        expire_cache(t)
+
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def revalidate(*args):
+            with lock:
+                running.append(None)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+        monkeypatch.setattr(tvdb_api, '_revalidate', revalidate)
+
+        t[1]
+        self.wait_for_refresh(t)
+        assert len(peak) == 11
+        assert max(peak) <= 2
+
+    def test_too_stale(self, fake_tvdb, tmpdir):
+        """Checks responses which expired longer ago than allowed are
+        requested again before being used
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.tvdb(cache=str(tmpdir))[1]
+
+        fake_tvdb.routes[('GET', '/series/1')] = (
+            200, {'data': {'id': 1, 'seriesName': 'Renamed Show', 'status': 'Ended'}})
+        t = fake_tvdb.tvdb(cache=str(tmpdir), stale_while_revalidate=0)
+        expire_cache(t)
+        time.sleep(0.01)
+        assert t[1]['seriesName'] == 'Renamed Show'
+
+
+class TestTvdbOffline:
+    def test_uses_cache_only(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3}, page_size=2)
+        fake_tvdb.tvdb(cache=str(tmpdir), actors=True)['Fake Show']['_actors']
+        tmpdir.join('tvdb_api.token').remove()
+        fake_tvdb.stop()
+
+        t = fake_tvdb.tvdb(cache=str(tmpdir), actors=True, offline=True)
+        # expired responses are used too
+        expire_cache(t)
+        show = t['Fake Show']
+        assert show[1][3]['episodeName'] == 'Episode 1x3'
+        assert show['_actors'][0]['name'] == 'Actor One'
+        assert not tmpdir.join('tvdb_api.token').check()
+
+    def test_miss(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        t = fake_tvdb.tvdb(cache=str(tmpdir), offline=True)
+        with pytest.raises(tvdb_api.tvdb_notcached):
+            t['Fake Show']
+        assert fake_tvdb.requests == []
+
+    def test_without_cache(self, fake_tvdb):
+        with pytest.raises(tvdb_api.tvdb_notcached):
+            fake_tvdb.tvdb(offline=True)[1]
+        assert fake_tvdb.requests == []
+
+
+class TestTvdbCacheTtl:
+    def test_endpoint_ttl(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.tvdb(cache=str(tmpdir))['Fake Show']
+
+        del fake_tvdb.requests[:]
+        fake_tvdb.tvdb(cache=str(tmpdir), cache_ttl={'search': 0})['Fake Show']
+        assert fake_tvdb.paths() == ['/search/series?name=Fake%20Show']
+
+    def test_ended_series(self, fake_tvdb, tmpdir):
+        """Checks shows which ended use the 'ended' TTL, others the TTL of
+        each endpoint
+        """
+        fake_tvdb.add_show(1, 'Ended Show', {1: 3})
+        fake_tvdb.add_show(2, 'Running Show', {1: 3})
+        fake_tvdb.routes[('GET', '/series/2')] = (
+            200, {'data': {'id': 2, 'seriesName': 'Running Show', 'status': 'Continuing'}})
+        ttl = {'series': 0, 'episodes': 0, 'ended': 3600}
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_ttl=ttl)
+        t[1]
+        t[2]
+
+        del fake_tvdb.requests[:]
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_ttl=ttl)
+        t[1]
+        t[2]
+        assert sorted(fake_tvdb.paths()) == ['/series/2', '/series/2/episodes']
+
+    def test_unknown_status_remembered(self, fake_tvdb, tmpdir):
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        reads = []
+        get_response_and_time = t.session.cache.get_response_and_time
+
+        def counting(key):
+            reads.append(key)
+            return get_response_and_time(key)
+        t.session.cache.get_response_and_time = counting
+
+        assert t._seriesStatus(1, 'en') is None
+        assert t._seriesStatus(1, 'en') is None
+        assert len(reads) == 1
+
+    def test_revived_series(self, fake_tvdb, tmpdir):
+        """Checks the status follows the series information loaded last
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_ttl={'series': 60, 'ended': 3600})
+        t[1]
+        assert t._seriesStatus(1, 'en') == 'Ended'
+
+        fake_tvdb.routes[('GET', '/series/1')] = (
+            200, {'data': {'id': 1, 'seriesName': 'Fake Show', 'status': 'Continuing'}})
+        t.config['cache_ttl']['ended'] = 0
+        t._loadUrl(t.config['url_seriesInfo'] % 1, 'en')
+        assert t._seriesStatus(1, 'en') == 'Continuing'
+        assert t._ttl(t.config['url_seriesInfo'] % 1, 'en') == datetime.timedelta(seconds=60)
+
+    def test_default_ttl(self):
+        t = tvdb_api.Tvdb(cache=False)
+        request = tvdb_api.requests.Request('GET', t.config['url_seriesBannerInfo'] % (1, 'poster')).prepare()
+        assert t._cacheExpiry(request) == datetime.timedelta(days=3)
+
+
+def age_cache(t, days):
+    """Makes every response cached by t days older
+    """
+    responses = t.session.cache.responses
+    for key in list(responses):
+        response, created = responses[key]
+        responses[key] = (response, created - datetime.timedelta(days=days))
+
+
+class TestTvdbCacheExpiry:
+    def cached_show(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 6}, page_size=2)
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_sweep=0)
+        t['Fake Show']
+        return t
+
+    def test_not_expired_on_construction(self, fake_tvdb, tmpdir):
+        t = self.cached_show(fake_tvdb, tmpdir)
+        count = len(t.session.cache.responses)
+        age_cache(t, 365)
+
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_sweep=0)
+        assert len(t.session.cache.responses) == count
+
+    def test_expire_cache_limit(self, fake_tvdb, tmpdir):
+        """Checks each call examines at most limit responses, continuing
+        where the previous call stopped
+        """
+        t = self.cached_show(fake_tvdb, tmpdir)
+        count = len(t.session.cache.responses)
+        fake_tvdb.routes[('GET', '/series/2')] = fake_tvdb.routes[('GET', '/series/1')]
+        age_cache(t, 365)
+        t[2]
+
+        removed = []
+        for i in range(count):
+            removed.append(t.expire_cache(limit=2))
+        assert max(removed) <= 2
+        assert sum(removed) == count
+        assert len(t.session.cache.responses) == 1
+        assert tmpdir.join('tvdb_api.expiry').check()
+
+    def test_expire_cache_all(self, fake_tvdb, tmpdir):
+        t = self.cached_show(fake_tvdb, tmpdir)
+        count = len(t.session.cache.responses)
+        assert t.expire_cache() == 0
+        age_cache(t, 365)
+        assert t.expire_cache() == count
+        assert len(t.session.cache.responses) == 0
+
+    def test_endpoint_ttl(self, fake_tvdb, tmpdir):
+        """Checks each response expires by the TTL of its own endpoint
+        """
+        t = self.cached_show(fake_tvdb, tmpdir)
+        search_key = t._cacheKey(t.config['url_getSeries'] % 'Fake%20Show', 'en')
+        assert search_key in t.session.cache.responses
+        age_cache(t, 2 / 24.0)
+
+        assert t.expire_cache() == 1
+        assert search_key not in t.session.cache.responses
+
+    def test_no_sweep_at_startup(self, fake_tvdb, tmpdir):
+        t = self.cached_show(fake_tvdb, tmpdir)
+        count = len(t.session.cache.responses)
+        age_cache(t, 365)
+
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_sweep=100)
+        t.session
+        time.sleep(0.2)
+        assert len(t.session.cache.responses) == count
+
+    def test_background_sweeper(self, fake_tvdb, tmpdir):
+        t = self.cached_show(fake_tvdb, tmpdir)
+        age_cache(t, 365)
+
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_sweep=100)
+        t.config['cache_sweep_interval'] = 0.1
+        t.session
+        for i in range(100):
+            if len(t.session.cache.responses) == 0:
+                break
+            time.sleep(0.05)
+        assert len(t.session.cache.responses) == 0
+
+
+class TestTvdbLazySession:
+    def test_no_io_on_construction(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        assert t._session is None
+        assert tmpdir.listdir() == []
+
+        t[1]
+        assert tmpdir.join('tvdb_api.sqlite').check()
+
+    def test_requests_imported_on_first_use(self):
+        import subprocess
+        code = (
+            "import sys; import tvdb_api; t = tvdb_api.Tvdb(); t.config['language']; "
+            "print('%s %s' % ('requests' in sys.modules, 'requests_cache' in sys.modules))")
+        output = subprocess.check_output(
+            [sys.executable, '-c', code],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        assert output.split() == [b'False', b'False']
+
+
+class TestTvdbResponseCache:
+    def test_shared_between_instances(self, fake_tvdb, tmpdir):
+        """Checks a second instance using the same cache gets the decoded
+        responses from memory, without reading the sqlite cache
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.tvdb(cache=str(tmpdir))[1]
+        assert len(tvdb_api.response_cache) > 0
+
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        reads = []
+        get_response_and_time = t.session.cache.get_response_and_time
+
+        def counting_get(key):
+            reads.append(key)
+            return get_response_and_time(key)
+        t.session.cache.get_response_and_time = counting_get
+
+        assert t[1][1][3]['episodeName'] == 'Episode 1x3'
+        assert reads == []
+        assert fake_tvdb.paths().count('/series/1') == 1
+
+    def test_expired(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.tvdb(cache=str(tmpdir))[1]
+
+        fake_tvdb.routes[('GET', '/series/1')] = (
+            200, {'data': {'id': 1, 'seriesName': 'Renamed Show', 'status': 'Ended'}})
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        expire_cache(t)
+        assert t[1]['seriesName'] == 'Renamed Show'
+
+    def test_cache_key(self, tmpdir):
+        """Checks keys computed from the URL match those of create_key
+        """
+        t = tvdb_api.Tvdb(cache=str(tmpdir))
+        for url, language in [(t.config['url_seriesInfo'] % 76156, 'en'),
+                              (tvdb_api._pageUrl(t.config['url_epInfo'] % 76156, 3), 'de'),
+                              (t.config['url_getSeries'] % 'the%20office', 'fr')]:
+            session = tvdb_api.requests.Session()
+            session.headers['Accept-Language'] = language
+            request = session.prepare_request(tvdb_api.requests.Request('GET', url))
+            assert t._cacheKey(url, language) == t.session.cache.create_key(request)
+
+    def test_changing_result_leaves_cache(self, fake_tvdb, tmpdir):
+        """Checks changing data returned from memory does not change what
+        later lookups get
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        url = t.config['url_epInfo'] % 1
+        t._loadUrl(url)[0]['episodeName'] = 'Changed'
+        t._loadUrl(url).append({})
+        for ep in t.iter_episodes(1):
+            ep['episodeName'] = 'Changed'
+
+        episodes = fake_tvdb.tvdb(cache=str(tmpdir))._loadUrl(url)
+        assert [ep['episodeName'] for ep in episodes] == ['Episode 1x1', 'Episode 1x2', 'Episode 1x3']
+
+    def test_evicts_least_recently_used(self):
+        now = datetime.datetime.utcnow()
+        cache = tvdb_api.ResponseCache(max_entries=2, max_bytes=100)
+        cache.put('a', {'a': 1}, now, 10)
+        cache.put('b', {'b': 1}, now, 10)
+        cache.get('a')
+        cache.put('c', {'c': 1}, now, 10)
+        assert cache.get('b') is None
+        assert cache.get('a') == ({'a': 1}, now)
+
+        cache.put('d', {'d': 1}, now, 85)
+        assert cache.get('c') is None
+        assert cache.get('a') is not None
+        assert len(cache) == 2
+
+        # too large to be kept at all
+        cache.put('e', {'e': 1}, now, 101)
+        assert cache.get('e') is None
+        assert cache.get('d') is not None
+
+        cache.clear()
+        for key in 'fgh':
+            cache.put(key, {key: 1}, now, 10)
+        assert cache.get('f') is None
+        assert len(cache) == 2
+
+    def test_sync(self, fake_tvdb, tmpdir):
+        """Checks series changed since the last sync are dropped from
+        memory as well
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        t[1]
+        t._storeLastSync(time.time() - 60)
+
+        fake_tvdb.routes[('GET', '/updated/query?*')] = (
+            200, {'data': [{'id': 1, 'lastUpdated': int(time.time())}]})
+        fake_tvdb.routes[('GET', '/series/1')] = (
+            200, {'data': {'id': 1, 'seriesName': 'Renamed Show', 'status': 'Ended'}})
+        assert t.sync() == [1]
+        assert fake_tvdb.tvdb(cache=str(tmpdir))[1]['seriesName'] == 'Renamed Show'
+
+
+class TestTvdbShowSnapshots:
+    def new_process(self, monkeypatch):
+        monkeypatch.setattr(tvdb_api, 'response_cache', tvdb_api.ResponseCache())
+
+    def test_warm_start(self, fake_tvdb, tmpdir, monkeypatch):
+        """Checks a show built before is read back whole, without reading
+        any cached response
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3, 2: 2}, page_size=2)
+        fake_tvdb.tvdb(cache=str(tmpdir))[1]
+        requests_made = len(fake_tvdb.requests)
+
+        self.new_process(monkeypatch)
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        reads = []
+        get_response_and_time = t.session.cache.get_response_and_time
+
+        def counting_get(key):
+            reads.append(key)
+            return get_response_and_time(key)
+        t.session.cache.get_response_and_time = counting_get
+
+        show = t[1]
+        assert show['seriesName'] == 'Fake Show'
+        assert sorted(show.keys()) == [1, 2]
+        assert show[2][2]['episodeName'] == 'Episode 2x2'
+        assert show[2][2].season.show is show
+        assert show._tvdb is t
+        assert reads == []
+        assert len(fake_tvdb.requests) == requests_made
+
+    def test_lazy_data(self, fake_tvdb, tmpdir, monkeypatch):
+        """Checks banners and actors which were not loaded are requested
+        when accessed, and only for instances which enable them
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.tvdb(cache=str(tmpdir), actors=True)[1]
+
+        self.new_process(monkeypatch)
+        show = fake_tvdb.tvdb(cache=str(tmpdir), actors=True)[1]
+        assert show['_actors'][0]['name'] == 'Actor One'
+        assert '_actors' not in fake_tvdb.tvdb(cache=str(tmpdir))[1].data
+
+    def test_keys(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        t[1]
+        fake_tvdb.tvdb(cache=str(tmpdir), dvdorder=True)[1]
+        assert sorted(t._showSnapshots().keys()) == ['1:en:aired', '1:en:dvd']
+
+    def test_lazy_seasons(self, fake_tvdb, tmpdir, monkeypatch):
+        """Checks a show stored before its seasons were loaded is
+        completed for instances loading whole shows
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3, 2: 2})
+        fake_tvdb.tvdb(cache=str(tmpdir), lazy_seasons=True)[1]
+
+        self.new_process(monkeypatch)
+        show = fake_tvdb.tvdb(cache=str(tmpdir))[1]
+        assert show._allSeasonsLoaded
+        assert dict.__contains__(show, 2)
+
+    def test_expired(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.tvdb(cache=str(tmpdir))[1]
+
+        fake_tvdb.routes[('GET', '/series/1')] = (
+            200, {'data': {'id': 1, 'seriesName': 'Renamed Show', 'status': 'Ended'}})
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        expire_cache(t)
+        assert t[1]['seriesName'] == 'Renamed Show'
+        assert fake_tvdb.tvdb(cache=str(tmpdir))[1]['seriesName'] == 'Renamed Show'
+
+    def test_sync(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        t = fake_tvdb.tvdb(cache=str(tmpdir))
+        t[1]
+        t._storeLastSync(time.time() - 60)
+
+        fake_tvdb.routes[('GET', '/updated/query?*')] = (
+            200, {'data': [{'id': 1, 'lastUpdated': int(time.time())}]})
+        assert t.sync() == [1]
+        assert list(t._showSnapshots().keys()) == []
+
+    def test_disabled(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_shows=False)
+        t[1]
+        assert t._showSnapshots() is None
+
+
+class TestTvdbCacheBudget:
+    def cached_keys(self, t):
+        with t.session.cache.responses.connection() as con:
+            return set(row[0] for row in con.execute("select key from responses"))
+
+    def accessed(self, t):
+        with t.session.cache.responses.connection() as con:
+            return con.execute("select count(*), total(size) from access").fetchone()
+
+    def test_max_entries(self, fake_tvdb, tmpdir, monkeypatch):
+        """Checks the least recently used responses are removed first,
+        counting responses read from the cache as used
+        """
+        for sid in [1, 2, 3]:
+            fake_tvdb.add_show(sid, 'Show %d' % sid, {1: 3})
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_shows=False, cache_max_entries=5)
+        t[1]
+        t[2]
+        assert len(self.cached_keys(t)) == 4
+
+        # read show 1 from the cache again
+        t.shows.clear()
+        monkeypatch.setattr(tvdb_api, 'response_cache', tvdb_api.ResponseCache())
+        t[1]
+        t[3]
+
+        keys = self.cached_keys(t)
+        assert len(keys) == 4
+        for sid, cached in [(1, True), (2, False), (3, True)]:
+            for url in [t.config['url_seriesInfo'] % sid, t.config['url_epInfo'] % sid]:
+                assert (t._cacheKey(url, 'en') in keys) == cached
+        assert self.accessed(t)[0] == 4
+
+    def test_max_size(self, fake_tvdb, tmpdir):
+        for sid in [1, 2, 3]:
+            fake_tvdb.add_show(sid, 'Show %d' % sid, {1: 10})
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_max_size=2000)
+        for sid in [1, 2, 3]:
+            t[sid]
+
+        entries, size = self.accessed(t)
+        # each show is a series and episodes response, and the built show
+        assert entries < 9
+        assert 0 < size <= 2000
+        with t.session.cache.responses.connection() as con:
+            stored = con.execute(
+                "select (select total(length(value)) from responses) + "
+                "(select total(length(value)) from shows)").fetchone()[0]
+        assert stored == size
+
+    def test_existing_entries(self, fake_tvdb, tmpdir):
+        """Checks responses cached before the budget was set are counted,
+        as the least recently used
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.tvdb(cache=str(tmpdir), cache_shows=False)[1]
+
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_shows=False, cache_max_entries=100)
+        assert self.accessed(t)[0] == 2
+
+    def test_existing_entries_counted_once(self, fake_tvdb, tmpdir):
+        """Checks the cache file is only scanned for existing entries the
+        first time a budget is set
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        fake_tvdb.add_show(2, 'Other Show', {1: 3})
+        fake_tvdb.tvdb(cache=str(tmpdir), cache_shows=False, cache_max_entries=100)[1]
+        fake_tvdb.tvdb(cache=str(tmpdir), cache_shows=False)[2]
+
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_shows=False, cache_max_entries=100)
+        t.session
+        assert self.accessed(t)[0] == 2
+
+    def test_deleted(self, fake_tvdb, tmpdir):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 3})
+        t = fake_tvdb.tvdb(cache=str(tmpdir), cache_max_entries=100)
+        t[1]
+        assert self.accessed(t)[0] == 3
+
+        t._invalidateSeries(1)
+        assert self.accessed(t)[0] == 0
+
+
+class TestTvdbPrefetch:
+    def test_prefetch(self, fake_tvdb):
+        """Checks shows are loaded by name and id, and failures are returned
+        rather than raised
+        """
+        fake_tvdb.add_show(1, 'First Show', {1: 2})
+        fake_tvdb.add_show(2, 'Second Show', {1: 3})
+        fake_tvdb.add_show(3, 'Third Show', {1: 4})
+        t = fake_tvdb.tvdb()
+
+        results = t.prefetch(['First Show', 2, 'Missing Show', 'Third Show', 2], workers=4)
+
+        assert [key for key, result in results] == ['First Show', 2, 'Missing Show', 'Third Show', 2]
+        assert results[0][1]['seriesName'] == 'First Show'
+        assert results[1][1] is results[4][1]
+        assert isinstance(results[2][1], tvdb_shownotfound)
+        assert len(results[3][1][1]) == 4
+
+        assert sorted(t.shows.keys()) == [1, 2, 3]
+        assert t.corrections == {'First Show': 1, 'Third Show': 3}
+        assert fake_tvdb.paths().count('/series/2') == 1
+
+    def test_threads_shared(self, fake_tvdb):
+        """Checks the requests of the shows prefetched share the workers
+        threads, instead of each show starting threads of its own
+        """
+        for sid in range(1, 9):
+            fake_tvdb.add_show(sid, 'Show %d' % sid, {1: 6}, page_size=2)
+        t = fake_tvdb.tvdb(workers=3)
+        lock = threading.Lock()
+        threads = set()
+        load_page = t._loadPage
+
+        def recording(url, language):
+            with lock:
+                threads.add(threading.current_thread())
+            return load_page(url, language)
+        t._loadPage = recording
+
+        t.prefetch(list(range(1, 9)))
+        assert sorted(t.shows.keys()) == list(range(1, 9))
+        # the pool and the calling thread
+        assert 1 < len(threads) <= 4
+
+    def test_more_than_max_shows(self, fake_tvdb):
+        """Checks shows dropped from t.shows are loaded again when looked up
+        """
+        names = ['Show %d' % sid for sid in range(1, 151)]
+        for sid, name in enumerate(names, 1):
+            fake_tvdb.add_show(sid, name, {1: 1})
+        t = fake_tvdb.tvdb()
+        t.prefetch(names)
+
+        # the next show added makes the container drop all but 100 shows
+        t.shows._lastgc = 0
+        t.shows[0] = None
+        assert 1 not in t.shows
+        assert t['Show 1']['seriesName'] == 'Show 1'
+        assert t[2]['seriesName'] == 'Show 2'
+
+    def test_unlimited_shows(self, fake_tvdb):
+        names = ['Show %d' % sid for sid in range(1, 121)]
+        for sid, name in enumerate(names, 1):
+            fake_tvdb.add_show(sid, name, {1: 1})
+        t = fake_tvdb.tvdb(max_shows=None)
+        t.prefetch(names)
+
+        t.shows._lastgc = 0
+        t.shows[0] = None
+        assert len(t.shows) == 121
+
+
 if __name__ == '__main__':
     pytest.main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+#encoding:utf-8
+#author:dbr/Ben
+#project:tvdb_api
+#repository:http://github.com/dbr/tvdb_api
+#license:unlicense (http://unlicense.org/)
+
+"""Unittests for tvdb_async, run against the local FakeTvdb server
+"""
+
+import os
+import sys
+import time
+import pytest
+
+# Force parent directory onto path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('aiohttp')
+
+import asyncio
+
+import tvdb_api
+from tvdb_api import tvdb_shownotfound
+from tvdb_async import AsyncTvdb
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsyncTvdb:
+    def test_show_by_name(self, fake_tvdb):
+        """Checks a show looked up by name is fully loaded, with banners
+        and actors, using the same model classes as Tvdb
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 10, 2: 5}, page_size=4)
+
+        async def lookup():
+            async with fake_tvdb.tvdb(AsyncTvdb, banners=True, actors=True) as t:
+                return await t['Fake Show']
+        show = run(lookup())
+
+        assert isinstance(show, tvdb_api.Show)
+        assert isinstance(show[2][5], tvdb_api.Episode)
+        assert show['seriesName'] == 'Fake Show'
+        assert len(show[1]) == 10
+        assert show[2][5]['episodeName'] == 'Episode 2x5'
+        assert show['_actors'][0]['name'] == 'Actor One'
+        assert sorted(show['_banners'].keys()) == ['fanart', 'poster']
+        assert fake_tvdb.paths('POST') == ['/login']
+
+    def test_shownotfound(self, fake_tvdb):
+        """Checks the same exceptions as Tvdb are raised
+        """
+        async def lookup():
+            async with fake_tvdb.tvdb(AsyncTvdb) as t:
+                return await t['Missing Show']
+
+        with pytest.raises(tvdb_shownotfound):
+            run(lookup())
+
+    def test_search(self, fake_tvdb):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 1})
+
+        async def search():
+            async with fake_tvdb.tvdb(AsyncTvdb) as t:
+                return await t.search('Fake Show')
+
+        assert [series['id'] for series in run(search())] == [1]
+
+    def test_prefetch(self, fake_tvdb):
+        fake_tvdb.add_show(1, 'First Show', {1: 2})
+        fake_tvdb.add_show(2, 'Second Show', {1: 3})
+
+        async def prefetch():
+            async with fake_tvdb.tvdb(AsyncTvdb) as t:
+                return await t.prefetch(['First Show', 2, 'Missing Show'])
+        results = run(prefetch())
+
+        assert results[0][1]['seriesName'] == 'First Show'
+        assert len(results[1][1][1]) == 3
+        assert isinstance(results[2][1], tvdb_shownotfound)
+
+    def test_iter_episodes_stops_early(self, fake_tvdb):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 10, 2: 5}, page_size=4)
+
+        async def first_episode():
+            async with fake_tvdb.tvdb(AsyncTvdb) as t:
+                async for ep in t.iter_episodes(1):
+                    return ep
+
+        assert run(first_episode())['episodeName'] == 'Episode 1x1'
+        assert fake_tvdb.paths() == ['/series/1/episodes']
+
+    def test_revoked_token_replaced(self, fake_tvdb):
+        """Checks a request failing with 401 logs in again and is retried
+        """
+        fake_tvdb.add_show(1, 'First Show', {1: 2})
+        fake_tvdb.add_show(2, 'Second Show', {1: 2})
+
+        async def lookup():
+            async with fake_tvdb.tvdb(AsyncTvdb) as t:
+                await t[1]
+                fake_tvdb.revoked_tokens.add(t.headers['Authorization'])
+                return await t[2]
+
+        assert run(lookup())[1][2]['episodeName'] == 'Episode 1x2'
+        assert fake_tvdb.paths('POST') == ['/login', '/login']
+
+    def test_summary(self, fake_tvdb):
+        """Checks the summary is requested once and kept by the show
+        """
+        fake_tvdb.add_show(1, 'Fake Show', {1: 2, 2: 3})
+
+        async def summary():
+            async with fake_tvdb.tvdb(AsyncTvdb) as t:
+                first = await t.summary(1)
+                assert await t.summary(1) is first
+                return first, t.shows[1]
+        summary, show = run(summary())
+
+        assert summary['airedEpisodes'] == '5'
+        assert show.summary() is summary
+        assert show.has_season(2)
+        assert fake_tvdb.paths().count('/series/1/episodes/summary') == 1
+
+    def test_no_blocking_entry_points(self):
+        """Checks none of Tvdb's blocking methods are available
+        """
+        t = AsyncTvdb()
+        for name in ['sync', 'expire_cache', 'session', '_loadSeason', '_getSummary']:
+            assert not hasattr(t, name)
+
+
+class TestAsyncTvdbTransport:
+    def test_read_timeout(self, fake_tvdb):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 2})
+        status, series = fake_tvdb.routes[('GET', '/series/1')]
+
+        def delayed(handler):
+            time.sleep(1)
+            return series
+        fake_tvdb.routes[('GET', '/series/1')] = (status, delayed)
+
+        async def lookup():
+            async with fake_tvdb.tvdb(AsyncTvdb, read_timeout=0.2, retries=0) as t:
+                return await t[1]
+
+        start = time.time()
+        with pytest.raises(tvdb_api.tvdb_error):
+            run(lookup())
+        assert time.time() - start < 0.9
+
+    def test_retries_and_breaker(self, fake_tvdb, monkeypatch):
+        """Checks failures are retried, then counted by the shared
+        circuit breaker, which stops further requests
+        """
+        breaker = tvdb_api.CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        monkeypatch.setattr(tvdb_api, 'circuit_breaker', breaker)
+        fake_tvdb.routes[('GET', '/series/1')] = (503, {'Error': 'Unavailable'})
+
+        async def lookup():
+            async with fake_tvdb.tvdb(AsyncTvdb, retries=2, retry_backoff=0.01) as t:
+                return await t[1]
+
+        with pytest.raises(tvdb_api.tvdb_error):
+            run(lookup())
+        assert fake_tvdb.paths().count('/series/1') == 3
+        assert breaker.state == 'open'
+
+        count = len(fake_tvdb.requests)
+        with pytest.raises(tvdb_api.tvdb_error):
+            run(lookup())
+        assert len(fake_tvdb.requests) == count
+
+    def test_rate_limited(self, fake_tvdb, monkeypatch):
+        limiter = tvdb_api.RateLimiter(rate=20, burst=1)
+        monkeypatch.setattr(tvdb_api, 'rate_limiter', limiter)
+        fake_tvdb.add_show(1, 'Fake Show', {1: 10}, page_size=2)
+
+        async def lookup():
+            async with fake_tvdb.tvdb(AsyncTvdb) as t:
+                return await t[1]
+
+        start = time.time()
+        run(lookup())
+        # a login and 6 requests, spaced out after the first
+        assert time.time() - start >= 0.25
+
+    def test_offline(self, fake_tvdb):
+        async def lookup():
+            async with fake_tvdb.tvdb(AsyncTvdb, offline=True) as t:
+                return await t[1]
+
+        with pytest.raises(tvdb_api.tvdb_notcached):
+            run(lookup())
+        assert fake_tvdb.requests == []
+
+    def test_deadline(self, fake_tvdb):
+        fake_tvdb.add_show(1, 'Fake Show', {1: 2})
+        status, series = fake_tvdb.routes[('GET', '/series/1')]
+
+        def delayed(handler):
+            time.sleep(1)
+            return series
+        fake_tvdb.routes[('GET', '/series/1')] = (status, delayed)
+
+        async def lookup():
+            async with fake_tvdb.tvdb(AsyncTvdb) as t:
+                return await t.get(1, deadline=0.3)
+
+        start = time.time()
+        with pytest.raises(tvdb_api.tvdb_deadlineexceeded):
+            run(lookup())
+        assert time.time() - start < 0.9
+        assert tvdb_api.circuit_breaker.state == 'closed'
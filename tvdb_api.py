@@ -21,18 +21,52 @@ __version__ = "2.0-dev"
 
 import sys
 import os
+import re
 import time
 import types
+import random
 import getpass
 import tempfile
 import warnings
 import logging
 import datetime
 import hashlib
+import threading
+import weakref
+import json
+import base64
+import pickle
+import marshal
+import zlib
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    # Python 2 without the "futures" backport, requests are made one
+    # after another instead
+    ThreadPoolExecutor = None
+
+
+class _LazyModule(object):
+    """Stands in for the module name, which is only imported when one of
+    its attributes is first used. requests and requests_cache take much
+    longer to import than the rest of tvdb_api, and are not needed until
+    the first request is made
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            # importlib is not available on Python 2.6
+            __import__(self._name)
+            self._module = sys.modules[self._name]
+        return getattr(self._module, attr)
+
 
-import requests
-import requests_cache
-from requests_cache.backends.base import _to_bytes, _DEFAULT_HEADERS
+requests = _LazyModule('requests')
+requests_cache = _LazyModule('requests_cache')
 
 
 IS_PY2 = sys.version_info[0] == 2
@@ -52,13 +86,188 @@ else:
     int_types = int
     text_type = str
 
-lastTimeout = None
-
 
 def log():
     return logging.getLogger("tvdb_api")
 
 
+# Per-thread state, currently the deadline set by Tvdb.get
+_local = threading.local()
+
+
+def _deadline():
+    """Returns the deadline (in seconds since the epoch) of the lookup
+    running in this thread, or None
+    """
+    return getattr(_local, 'deadline', None)
+
+
+def _timeLeft():
+    """Returns the seconds left until the deadline of this thread, or
+    None if there is no deadline. Raises tvdb_deadlineexceeded once the
+    deadline has passed
+    """
+    deadline = _deadline()
+    if deadline is None:
+        return None
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise tvdb_deadlineexceeded("Deadline exceeded")
+    return remaining
+
+
+def _mapParallel(func, items, executor):
+    """Calls func on each of items using the threads of executor (a
+    ThreadPoolExecutor), and returns the results in the same order as
+    items.
+
+    The calling thread runs the items no thread of executor has started
+    by the time it gets to them, so nested calls sharing executor (such
+    as the pages of each show loaded by prefetch) never wait for a free
+    thread, and never start more threads than executor has.
+
+    Falls back to a plain loop when executor is None or there is at most
+    one item. The first exception raised by func is re-raised once all
+    calls have finished.
+    """
+    items = list(items)
+    if executor is None or len(items) <= 1:
+        return [func(item) for item in items]
+
+    # the worker threads share the deadline of the calling thread
+    deadline = _deadline()
+
+    def call(item):
+        _local.deadline = deadline
+        try:
+            return func(item)
+        finally:
+            _local.deadline = None
+
+    futures = [executor.submit(call, item) for item in items]
+    results = []
+    error = None
+    for future, item in zip(futures, items):
+        try:
+            if future.cancel():
+                results.append(func(item))
+            else:
+                results.append(future.result())
+        except Exception as e:
+            results.append(None)
+            if error is None:
+                error = e
+    if error is not None:
+        raise error
+    return results
+
+
+def _tokenExpiry(token):
+    """Returns the expiry time (in seconds since the epoch) from the exp
+    claim of the JSON Web Token token, or None if it cannot be read
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload.encode('ascii')).decode('utf-8'))
+        return float(claims['exp'])
+    except Exception:
+        return None
+
+
+# Cache policy names of the API endpoints, with the series ID (if any)
+# as the first group
+_endpoints = [
+    ('search', re.compile(r'/search/series\b')),
+    ('updated', re.compile(r'/updated/')),
+    ('images', re.compile(r'/series/(\d+)/images\b')),
+    ('actors', re.compile(r'/series/(\d+)/actors\b')),
+    ('summary', re.compile(r'/series/(\d+)/episodes/summary\b')),
+    ('episodes', re.compile(r'/series/(\d+)/episodes\b')),
+    ('series', re.compile(r'/series/(\d+)/?(?:\?|$)')),
+]
+
+
+def _endpoint(url):
+    """Returns (endpoint name, series ID or None) for the API url, or
+    ('default', None) for anything else
+    """
+    for name, pattern in _endpoints:
+        match = pattern.search(url)
+        if match:
+            return name, int(match.group(1)) if match.groups() else None
+    return 'default', None
+
+
+def _writeJson(filename, data):
+    """Writes data as JSON to filename, replacing it at once so readers
+    never see a partly written file. The file is readable only by the
+    current user. Raises IOError or OSError when it cannot be written
+    """
+    # mkstemp creates the file readable only by the current user
+    fd, tmp_filename = tempfile.mkstemp(
+        dir=os.path.dirname(filename) or '.', prefix=os.path.basename(filename))
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    if os.name == 'nt' and os.path.exists(filename):
+        os.remove(filename)
+    os.rename(tmp_filename, filename)
+
+
+def _pageUrl(url, page):
+    """Returns url with its page query parameter set to page, keeping any
+    other query parameters
+    """
+    base, _, query = url.partition('?')
+    params = [p for p in query.split('&') if p and not p.startswith('page=')]
+    params.append('page=%s' % page)
+    return "%s?%s" % (base, '&'.join(params))
+
+
+def _nextPage(links):
+    """Returns the number of the page after the one with the pagination
+    links, or None if it was the last
+    """
+    return links.get('next') if links else None
+
+
+def _remainingPages(url, links, data):
+    """Plans loading the rest of the paginated result at url, whose first
+    page had the pagination links. The pages are requested by the caller:
+    this generator yields lists of page URLs (each to be requested at the
+    same time), is sent the list of their (data, links) results, and
+    extends data with the pages in order.
+
+    The first page tells the number of the last page, so all remaining
+    pages are requested at once. Without it (or when the result grew
+    while loading), links['next'] is followed one page at a time.
+    """
+    next_page = _nextPage(links)
+    last_page = links.get('last') if links else None
+
+    if next_page and last_page and last_page >= next_page:
+        pages = yield [_pageUrl(url, page) for page in range(next_page, last_page + 1)]
+        for page_data, links in pages:
+            data.extend(page_data or [])
+        next_page = _nextPage(links)
+
+    while next_page:
+        pages = yield [_pageUrl(url, next_page)]
+        page_data, links = pages[0]
+        data.extend(page_data or [])
+        next_page = _nextPage(links)
+
+
+def _distinct(items):
+    """Returns items without repeats, in the order given
+    """
+    distinct = []
+    for item in items:
+        if item not in distinct:
+            distinct.append(item)
+    return distinct
+
+
 ## Exceptions
 
 class tvdb_exception(Exception):
@@ -71,6 +280,16 @@ class tvdb_error(tvdb_exception):
     """
     pass
 
+class tvdb_deadlineexceeded(tvdb_error):
+    """The deadline given to Tvdb.get passed before the lookup finished
+    """
+    pass
+
+class tvdb_notcached(tvdb_error):
+    """In offline mode, the requested data is not in the cache
+    """
+    pass
+
 class tvdb_userabort(tvdb_exception):
     """User aborted the interactive selection (via
     the q command, ^c etc)
@@ -118,6 +337,261 @@ class tvdb_attributenotfound(tvdb_exception):
     pass
 
 
+## Transport
+
+class RateLimiter(object):
+    """Token bucket limiting how often requests are sent to thetvdb.com.
+
+    Up to burst requests can be made at once, after which requests are
+    let through at rate requests per second. A rate of None means no
+    limit. A single instance (tvdb_api.rate_limiter) is shared by every
+    Tvdb instance and thread in the process, and is set through the
+    rate_limit and rate_burst arguments of Tvdb, or directly:
+
+    >>> import tvdb_api
+    >>> tvdb_api.rate_limiter.configure(rate=5, burst=10)
+    """
+    def __init__(self, rate=None, burst=1):
+        self._lock = threading.Lock()
+        self.rate = self.burst = None
+        self.configure(rate, burst)
+
+    def configure(self, rate, burst=1):
+        """Sets the limit. The bucket is only refilled when the rate or
+        burst actually changes, so configuring the same limit again (as
+        every Tvdb(rate_limit=...) does) does not let another burst through
+        """
+        burst = max(1, burst)
+        with self._lock:
+            if (rate, burst) == (self.rate, self.burst):
+                return
+            self.rate = rate
+            self.burst = burst
+            self._tokens = float(self.burst)
+            self._updated = time.time()
+
+    def acquire(self):
+        """Blocks until another request may be sent. Raises
+        tvdb_deadlineexceeded if that is after the deadline of this
+        thread (see Tvdb.get)
+        """
+        while True:
+            wait = self._reserve()
+            if wait is None:
+                return
+            remaining = _timeLeft()
+            if remaining is not None and wait > remaining:
+                raise tvdb_deadlineexceeded("Deadline exceeded waiting for the rate limit")
+            time.sleep(wait)
+
+    def _reserve(self):
+        """Takes a token and returns None if one is available, otherwise
+        returns the seconds until the next one is
+        """
+        with self._lock:
+            if not self.rate:
+                return None
+            now = time.time()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / self.rate
+
+
+rate_limiter = RateLimiter()
+
+
+class CircuitBreaker(object):
+    """Stops sending requests to thetvdb.com for a while after it failed
+    repeatedly.
+
+    The breaker starts "closed". Once failure_threshold requests in a row
+    have failed (after retrying), it is "open" and requests fail at once
+    with tvdb_error, without connecting. After reset_timeout seconds it
+    is "half-open": a single request is let through to probe thetvdb.com,
+    closing the breaker when it succeeds and opening it again when it
+    fails. A single instance (tvdb_api.circuit_breaker) is shared by every
+    Tvdb instance in the process:
+
+    >>> tvdb_api.circuit_breaker.state
+    'closed'
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self._lock = threading.Lock()
+        self.failures = 0
+        self._openedAt = None
+        # token of the request probing thetvdb.com while half-open
+        self._probe = None
+        self.configure(failure_threshold, reset_timeout)
+
+    def configure(self, failure_threshold=5, reset_timeout=60):
+        """Changes the settings, leaving the breaker open if it is, as
+        every Tvdb instance given breaker settings calls this
+        """
+        with self._lock:
+            self.failure_threshold = max(1, failure_threshold)
+            self.reset_timeout = reset_timeout
+
+    def _state(self):
+        if self._openedAt is None:
+            return self.CLOSED
+        if time.time() - self._openedAt >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def allow(self):
+        """Returns a token if a request may be sent, or None. When
+        half-open, only the first caller gets one, as the probe. Every
+        token must be passed to release once the request has finished
+        """
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return object()
+            if state == self.HALF_OPEN and self._probe is None:
+                self._probe = object()
+                return self._probe
+            return None
+
+    def release(self, token):
+        """Forgets the request given token by allow. If it was the probe
+        and neither succeeded nor failed, another probe can be sent
+        """
+        with self._lock:
+            if token is not None and token is self._probe:
+                self._probe = None
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self._openedAt = None
+            self._probe = None
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probe is not None or self.failures >= self.failure_threshold:
+                if self._openedAt is None:
+                    log().debug("thetvdb.com failed %s times, opening circuit breaker" % self.failures)
+                self._openedAt = time.time()
+                self._probe = None
+
+
+circuit_breaker = CircuitBreaker()
+
+
+class TvdbAdapter(object):
+    """Transport adapter which Tvdb mounts on the sessions it creates.
+
+    Requests are sent through a regular requests HTTPAdapter. As a cached
+    session only calls its adapter for requests which are not answered
+    from the cache, only requests which actually reach thetvdb.com are
+    counted by the rate limiter and the circuit breaker.
+
+    Connection errors, timeouts and 5xx responses are retried up to
+    retries times, waiting a random time of up to backoff * 2 ** attempt
+    seconds before each retry. When every attempt failed, tvdb_error is
+    raised and the failure is counted by the circuit breaker, as is any
+    other unexpected exception. With force_connect the circuit breaker
+    never stops a request.
+
+    Within Tvdb.get, timeouts are shortened to the time left until the
+    deadline, and tvdb_deadlineexceeded is raised instead of retrying
+    once the deadline has passed.
+
+    A custom session passed as Tvdb's cache argument can mount one too:
+
+    >>> session.mount(Tvdb().config['api_url'], TvdbAdapter())
+    """
+    def __init__(self, retries=3, backoff=0.5, force_connect=False):
+        self.retries = retries
+        self.backoff = backoff
+        self.force_connect = force_connect
+        self._adapter = None
+
+    def _getAdapter(self):
+        if self._adapter is None:
+            self._adapter = requests.adapters.HTTPAdapter()
+        return self._adapter
+
+    def send(self, request, **kwargs):
+        token = None
+        if not self.force_connect:
+            token = circuit_breaker.allow()
+            if token is None:
+                raise tvdb_error("thetvdb.com failed repeatedly, not connecting for up to %s seconds" % (
+                    circuit_breaker.reset_timeout))
+
+        try:
+            return self._send(request, **kwargs)
+        except tvdb_exception:
+            # failures were already counted, and running out of time
+            # says nothing about thetvdb.com
+            raise
+        except Exception:
+            circuit_breaker.failure()
+            raise
+        finally:
+            circuit_breaker.release(token)
+
+    def _send(self, request, timeout=None, **kwargs):
+        attempt = 0
+        while True:
+            rate_limiter.acquire()
+            try:
+                response = self._getAdapter().send(
+                    request, timeout=self._timeout(timeout), **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                _timeLeft()
+                error = e
+            else:
+                if response.status_code < 500:
+                    circuit_breaker.success()
+                    return response
+                error = "HTTP error %s" % response.status_code
+                response.close()
+
+            if attempt >= self.retries:
+                circuit_breaker.failure()
+                raise tvdb_error("Could not load %s: %s" % (request.url, error))
+
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            remaining = _timeLeft()
+            if remaining is not None and delay >= remaining:
+                raise tvdb_deadlineexceeded("Deadline exceeded while retrying %s" % request.url)
+            attempt += 1
+            log().debug("Loading %s failed (%s), retrying in %.2f seconds" % (request.url, error, delay))
+            time.sleep(delay)
+
+    def _timeout(self, timeout):
+        """Returns timeout (a number or (connect, read) tuple) shortened
+        to the time left until the deadline of this thread
+        """
+        remaining = _timeLeft()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        return min(timeout, remaining)
+
+    def close(self):
+        if self._adapter is not None:
+            self._adapter.close()
+
+
 ## UI
 
 class BaseUI(object):
@@ -264,40 +738,230 @@ class ConsoleUI(BaseUI):
 ## Main API
 
 class ShowContainer(dict):
-    """Simple dict that holds a series of Show instances
+    """Simple dict that holds a series of Show instances. Every 20 seconds
+    at most, all but the max_shows latest shows are dropped (None keeps
+    them all)
     """
 
-    def __init__(self):
+    def __init__(self, max_shows=100):
         self._stack = []
         self._lastgc = time.time()
+        self._lock = threading.Lock()
+        self.max_shows = max_shows
 
     def __setitem__(self, key, value):
-        self._stack.append(key)
+        with self._lock:
+            self._stack.append(key)
+
+            # keep only the max_shows latest results
+            if self.max_shows is not None and time.time() - self._lastgc > 20:
+                for o in self._stack[:-self.max_shows]:
+                    self.pop(o, None)
+                self._stack = self._stack[-self.max_shows:]
 
-        # keep only the 100th latest results
-        if time.time() - self._lastgc > 20:
-            for o in self._stack[:-100]:
-                del self[o]
-            self._stack = self._stack[-100:]
+                self._lastgc = time.time()
 
-            self._lastgc = time.time()
+            super(ShowContainer, self).__setitem__(key, value)
 
-        super(ShowContainer, self).__setitem__(key, value)
+
+class SingleFlight(object):
+    """Runs a function only once for all threads calling it with the same
+    key at the same time. The first caller runs it, the others wait and
+    get the same result (or exception). If the first caller's deadline
+    passed, the others run the function again rather than failing too.
+
+    >>> flights = SingleFlight()
+    >>> flights.do(('sid', 76156), lambda: 'loaded')
+    'loaded'
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = {'done': threading.Event()}
+
+            if leader:
+                break
+
+            log().debug("Waiting for running call %r" % (key,))
+            call['done'].wait(_timeLeft())
+            if not call['done'].is_set():
+                raise tvdb_deadlineexceeded("Deadline exceeded waiting for %r" % (key,))
+            if isinstance(call.get('error'), tvdb_deadlineexceeded):
+                # the leader ran out of its own time, which may be shorter
+                # than ours: run the call again instead
+                continue
+            if 'error' in call:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = func()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+
+class LazyData(object):
+    """Placeholder for show data which is only requested from thetvdb.com
+    the first time it is accessed through Show.__getitem__ (for example
+    the _banners and _actors keys). The loaded value then replaces the
+    placeholder in Show.data
+    """
+    def __init__(self, load):
+        self._load = load
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._value = None
+
+    def __repr__(self):
+        return "<LazyData (not loaded yet)>"
+
+    def __call__(self):
+        with self._lock:
+            if not self._loaded:
+                self._value = self._load()
+                self._loaded = True
+        return self._value
 
 
 class Show(dict):
     """Holds a dict of seasons, and show data.
+
+    In lazy_seasons mode (see Tvdb.__init__) only the seasons which have
+    been accessed are loaded. Iterating over the show, its len() or
+    searching it load all of the remaining seasons first, while "in"
+    only checks the seasons which are already loaded. has_season checks
+    whether a season exists without loading it.
     """
     def __init__(self):
         dict.__init__(self)
         self.data = {}
+        # Tvdb instance which loaded the show, used to request seasons on
+        # demand (lazy_seasons mode) and the episode summary
+        self._tvdb = None
+        self._allSeasonsLoaded = True
+        self._requestedSeasons = set()
+        self._summary = None
+        self._lock = threading.RLock()
 
     def __repr__(self):
         return "<Show %r (containing %s seasons)>" % (
             self.data.get(u'seriesName', 'instance'),
-            len(self)
+            dict.__len__(self)
         )
 
+    def __reduce_ex__(self, protocol):
+        # the seasons are taken with dict.items, which (unlike items)
+        # does not load the remaining seasons
+        return (self.__class__, (), self.__getstate__(), None, iter(dict.items(self)))
+
+    def __getstate__(self):
+        """Pickles the loaded data only: the Tvdb instance, lock and
+        banners or actors which are not loaded yet are left out
+        """
+        state = self.__dict__.copy()
+        state['data'] = dict(
+            (key, value) for key, value in self.data.items()
+            if not isinstance(value, LazyData))
+        del state['_tvdb']
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._tvdb = None
+        self._lock = threading.RLock()
+
+    def _loadSeason(self, season):
+        """Requests season, if it is not loaded yet and seasons are being
+        loaded on demand
+        """
+        with self._lock:
+            if self._allSeasonsLoaded or season in self._requestedSeasons:
+                return
+            self._requestedSeasons.add(season)
+            if not dict.__contains__(self, season):
+                self._tvdb._loadSeason(self, season)
+
+    def _loadAllSeasons(self):
+        """Requests every episode of the show, if seasons are being loaded
+        on demand
+        """
+        with self._lock:
+            if not self._allSeasonsLoaded:
+                self._tvdb._loadAllSeasons(self)
+                self._allSeasonsLoaded = True
+
+    def summary(self):
+        """Returns the episode summary of the show, requested once from
+        thetvdb.com without loading any episodes. It is a dict containing
+        the airedSeasons and dvdSeasons (lists of season numbers, as
+        strings) and the airedEpisodes and dvdEpisodes counts:
+
+        >>> t = Tvdb(lazy_seasons=True)
+        >>> len(t['scrubs'].summary()['airedSeasons'])
+        10
+        """
+        with self._lock:
+            if self._summary is None:
+                if self._tvdb is None:
+                    raise tvdb_error(
+                        "Show was not loaded by Tvdb, cannot request its summary "
+                        "(for AsyncTvdb, use await t.summary(key))")
+                self._summary = self._tvdb._getSummary(self.data['id'])
+            return self._summary
+
+    def has_season(self, season):
+        """Returns True if the show has a season numbered season.
+
+        Loaded seasons are checked first. If the show is not fully loaded
+        (lazy_seasons mode) the remaining seasons are checked using the
+        summary, so no episodes are requested. With DVD ordering, the DVD
+        seasons are used, or the aired seasons for shows without any.
+        """
+        if dict.__contains__(self, season):
+            return True
+        if self._allSeasonsLoaded or season in self._requestedSeasons:
+            return False
+
+        summary = self.summary()
+        seasons = summary.get('airedSeasons')
+        if self._tvdb.config['dvdorder'] and summary.get('dvdSeasons'):
+            seasons = summary.get('dvdSeasons')
+        return text_type(season) in [text_type(s) for s in seasons or []]
+
+    def __iter__(self):
+        self._loadAllSeasons()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._loadAllSeasons()
+        return dict.__len__(self)
+
+    def keys(self):
+        self._loadAllSeasons()
+        return dict.keys(self)
+
+    def values(self):
+        self._loadAllSeasons()
+        return dict.values(self)
+
+    def items(self):
+        self._loadAllSeasons()
+        return dict.items(self)
+
     def __getitem__(self, key):
         v1_compatibility = {
             'seriesname': 'seriesName',
@@ -309,13 +973,20 @@ class Show(dict):
                 key, v1_compatibility[key])
             key = v1_compatibility[key]
 
+        if key not in self and isinstance(key, int_types):
+            self._loadSeason(key)
+
         if key in self:
             # Key is an episode, return it
             return dict.__getitem__(self, key)
 
         if key in self.data:
             # Non-numeric request is for show-data
-            return dict.__getitem__(self.data, key)
+            value = dict.__getitem__(self.data, key)
+            if isinstance(value, LazyData):
+                value = value()
+                self.data[key] = value
+            return value
 
         # Data wasn't found, raise appropriate error
         if isinstance(key, int) or key.isdigit():
@@ -560,26 +1231,508 @@ def create_key(self, request):
     else:
         url, body = request.url, request.body
     key = hashlib.sha256()
-    key.update(_to_bytes(request.method.upper()))
-    key.update(_to_bytes(url))
+    base = requests_cache.backends.base
+    key.update(base._to_bytes(request.method.upper()))
+    key.update(base._to_bytes(url))
     if request.body:
-        key.update(_to_bytes(body))
+        key.update(base._to_bytes(body))
     else:
-        if self._include_get_headers and request.headers != _DEFAULT_HEADERS:
+        if self._include_get_headers and request.headers != base._DEFAULT_HEADERS:
             for name, value in sorted(request.headers.items()):
                 # include only Accept-Language as it is important for context
                 if name in ['Accept-Language']:
-                    key.update(_to_bytes(name))
-                    key.update(_to_bytes(value))
+                    key.update(base._to_bytes(name))
+                    key.update(base._to_bytes(value))
     return key.hexdigest()
 
 
+def _getKey(url, language):
+    """Returns the key create_key gives a GET of url with the
+    Accept-Language header language, without preparing a request
+    """
+    key = hashlib.sha256()
+    base = requests_cache.backends.base
+    key.update(base._to_bytes('GET'))
+    key.update(base._to_bytes(url))
+    key.update(base._to_bytes('Accept-Language'))
+    key.update(base._to_bytes(language))
+    return key.hexdigest()
+
+
+def send(self, request, **kwargs):
+    """Replaces CachedSession.send, revalidating expired responses.
+
+    When a cached response has expired, it is not thrown away if it has
+    an ETag or Last-Modified header. Instead the request is sent with
+    If-None-Match or If-Modified-Since, and if thetvdb.com answers 304
+    Not Modified, the cached response is kept for another expire_after
+    seconds without transferring the body again.
+
+    If the session has a _maxStale timedelta, a response which expired
+    less than _maxStale ago is returned straight away, and revalidated
+    by a background thread (see _refreshInBackground).
+
+    If the session has an _expireAfter function, it is called with each
+    request and returns how long (as a timedelta) its response stays
+    fresh, instead of expire_after.
+    """
+    if self._is_cache_disabled or request.method not in self._cache_allowable_methods:
+        return requests_cache.CachedSession.send(self, request, **kwargs)
+
+    cache_key = self.cache.create_key(request)
+    try:
+        response, timestamp = self.cache.get_response_and_time(cache_key)
+    except (ImportError, TypeError):
+        response = None
+
+    if response is None:
+        return _revalidate(self, request, cache_key, None, kwargs)
+    if getattr(self.cache, '_budget', None) is not None:
+        self.cache._budget.touch('responses', cache_key)
+
+    expire_after = self._cache_expire_after
+    if getattr(self, '_expireAfter', None) is not None:
+        expire_after = self._expireAfter(request)
+
+    response.cached_at = timestamp
+    age = datetime.datetime.utcnow() - timestamp
+    if expire_after is None or age <= expire_after:
+        response.from_cache = True
+        return requests.hooks.dispatch_hook('response', request.hooks, response, **kwargs)
+
+    max_stale = getattr(self, '_maxStale', None)
+    if max_stale is not None and age <= expire_after + max_stale:
+        log().debug("Using stale response for %s while it is revalidated" % request.url)
+        _refreshInBackground(self, request, cache_key, response, kwargs)
+        response.from_cache = True
+        return requests.hooks.dispatch_hook('response', request.hooks, response, **kwargs)
+
+    return _revalidate(self, request, cache_key, response, kwargs)
+
+
+def _revalidate(session, request, cache_key, response, kwargs):
+    """Sends request for the expired cached response (or None, when
+    nothing is cached), conditionally if it has an ETag or Last-Modified
+    header, and updates the cache. Returns the new (or renewed cached)
+    response
+    """
+    conditional = request.copy()
+    etag = last_modified = None
+    if response is not None:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+    if etag:
+        conditional.headers['If-None-Match'] = etag
+    if last_modified:
+        conditional.headers['If-Modified-Since'] = last_modified
+    new_response = requests.Session.send(session, conditional, **kwargs)
+    # the decoded copy (if any) is replaced or dropped along with the response
+    response_cache.discard((session._cacheLocation, cache_key))
+
+    if new_response.status_code == 304 and response is not None:
+        log().debug("%s not modified, renewing cached response" % request.url)
+        for header in ['ETag', 'Last-Modified', 'Date']:
+            if header in new_response.headers:
+                response.headers[header] = new_response.headers[header]
+        session.cache.save_response(cache_key, response)
+        response.from_cache = True
+        response.cached_at = datetime.datetime.utcnow()
+        return requests.hooks.dispatch_hook('response', request.hooks, response, **kwargs)
+
+    if new_response.status_code in session._cache_allowable_codes:
+        session.cache.save_response(cache_key, new_response)
+        session._responseChanged(request)
+    elif response is not None and new_response.status_code != 401:
+        # only an expired login is no reason to drop the cached response
+        session.cache.delete(cache_key)
+    new_response.from_cache = False
+    return new_response
+
+
+def _refreshInBackground(session, request, cache_key, response, kwargs):
+    """Revalidates the stale cached response to request in the background,
+    unless it is already being revalidated. The refreshes are made by at
+    most session._refreshThreads daemon threads, which exit once there
+    is nothing left to refresh. The headers returned by the session's
+    _refreshHeaders function (the current login) are added to the request
+    first
+    """
+    request = request.copy()
+
+    def refresh():
+        try:
+            if getattr(session, '_refreshHeaders', None) is not None:
+                request.headers.update(session._refreshHeaders())
+            _revalidate(session, request, cache_key, response, kwargs)
+        except Exception as e:
+            log().debug("Revalidating %s failed: %s" % (request.url, e))
+        finally:
+            with session._refreshLock:
+                session._refreshing.discard(cache_key)
+
+    with session._refreshLock:
+        if cache_key in session._refreshing:
+            return
+        session._refreshing.add(cache_key)
+        session._refreshQueue.append(refresh)
+        if session._refreshWorkers >= session._refreshThreads:
+            return
+        session._refreshWorkers += 1
+
+    thread = threading.Thread(target=_refreshWorker, args=(session,), name="tvdb_api refresh")
+    thread.daemon = True
+    thread.start()
+
+
+def _refreshWorker(session):
+    """Runs the refreshes queued by _refreshInBackground until there are
+    none left
+    """
+    while True:
+        with session._refreshLock:
+            if not session._refreshQueue:
+                session._refreshWorkers -= 1
+                return
+            refresh = session._refreshQueue.pop(0)
+        refresh()
+
+
+def _expireEntries(cache, max_age, after, limit):
+    """Examines up to limit responses in cache, in order of their keys
+    starting after the key after, and removes those cached longer ago
+    than max_age(response), a timedelta. Returns the number removed, and
+    the last key examined (or None once the end of the cache was reached)
+    """
+    responses = cache.responses
+    if hasattr(responses, 'connection'):
+        # sqlite backend: select only the next keys instead of all
+        with responses.connection() as con:
+            keys = [row[0] for row in con.execute(
+                "select key from `%s` where key > ? order by key limit ?" % responses.table_name,
+                (after or '', limit))]
+    else:
+        keys = sorted(key for key in responses if key > (after or ''))[:limit]
+
+    removed = 0
+    now = datetime.datetime.utcnow()
+    for key in keys:
+        try:
+            response, created = responses[key]
+        except KeyError:
+            continue
+        except Exception as e:
+            log().debug("Removing unreadable cached response %s: %s" % (key, e))
+            created = None
+        if created is None or now - created > max_age(response):
+            cache.delete(key)
+            removed += 1
+
+    if len(keys) < limit:
+        return removed, None
+    return removed, keys[-1]
+
+
+def _containsAny(db, keys):
+    """Returns True if db (a DbDict of the sqlite cache, or any mapping)
+    holds any of keys, without reading the values
+    """
+    if hasattr(db, 'connection'):
+        # sqlite backend: a single query instead of one per key
+        with db.connection() as con:
+            return con.execute(
+                "select 1 from `%s` where key in (%s) limit 1" % (db.table_name, ','.join('?' * len(keys))),
+                keys).fetchone() is not None
+    return any(key in db for key in keys)
+
+
+def _sweepCache(cache, location, max_age, limit):
+    """Removes responses cached longer ago than max_age(response) from
+    cache, examining at most limit of them. Each sweep continues where the previous one
+    (in any process) stopped, which is stored in the file location +
+    '.expiry'. Returns the number of responses removed
+    """
+    filename = location + ".expiry"
+    try:
+        with open(filename) as f:
+            after = json.load(f).get('after')
+    except (IOError, OSError, ValueError, AttributeError):
+        after = None
+
+    removed, after = _expireEntries(cache, max_age, after, limit)
+    log().debug("Removed %d expired responses from the cache" % removed)
+
+    try:
+        _writeJson(filename, {'after': after})
+    except (IOError, OSError) as e:
+        log().warning("Could not store cache expiry position in %s: %s" % (filename, e))
+    return removed
+
+
+# The background sweepers running in this process, by cache location
+_sweepers = {}
+_sweepersLock = threading.Lock()
+
+
+def _startSweeper(tvdb, interval):
+    """Starts a daemon thread calling tvdb.expire_cache, for
+    config['cache_sweep'] responses, every interval seconds, unless one
+    is already running for the cache of tvdb. The first sweep is only
+    made after interval seconds, so short runs do not sweep at all.
+
+    The thread only keeps a weak reference to tvdb, and stops once tvdb
+    is gone; the next instance using the cache starts another
+    """
+    location = tvdb.config['cache_location']
+    with _sweepersLock:
+        if location in _sweepers:
+            return
+        _sweepers[location] = True
+    owner = weakref.ref(tvdb)
+
+    def sweep():
+        while True:
+            time.sleep(interval)
+            tvdb = owner()
+            if tvdb is None:
+                with _sweepersLock:
+                    _sweepers.pop(location, None)
+                return
+            try:
+                tvdb.expire_cache(limit=tvdb.config['cache_sweep'])
+            except Exception as e:
+                log().debug("Expiring cached responses failed: %s" % e)
+            tvdb = None
+
+    thread = threading.Thread(target=sweep, name="tvdb_api cache sweeper")
+    thread.daemon = True
+    thread.start()
+
+
+class _CacheBudget(object):
+    """Keeps a sqlite cache within max_bytes and/or max_entries (None for
+    no limit), by removing the least recently used cached responses and
+    built shows whenever a write takes it over.
+
+    The size and last access time of every entry are kept in the access
+    table of the same file, so the budget is shared by all processes
+    using it. Reads are only noted in memory and written to the table
+    with the next write, as that is when entries are removed.
+    """
+    tables = ['responses', 'shows']
+
+    def __init__(self, db, max_bytes=None, max_entries=None):
+        # any DbDict of the sqlite file, whose connections are used
+        self._db = db
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._touched = {}
+
+        with self._db.connection(True) as con:
+            existing = [row[0] for row in con.execute("select name from sqlite_master where type = 'table'")]
+            if 'access' in existing:
+                return
+            con.execute("create table if not exists access (tbl, key, atime, size, primary key (tbl, key))")
+            con.execute("create index if not exists access_atime on access (atime)")
+            for table in self.tables:
+                if table in existing:
+                    # entries cached before the budget was first set count
+                    # as the least recently used. This scans the whole
+                    # table, so is only done once per cache file
+                    con.execute(
+                        "insert or ignore into access select ?, key, 0, length(value) from `%s`" % table,
+                        (table,))
+
+    def touch(self, table, key):
+        with self._lock:
+            self._touched[(table, key)] = time.time()
+
+    def forget(self, table, key):
+        with self._db.connection(True) as con:
+            con.execute("delete from access where tbl = ? and key = ?", (table, key))
+
+    def written(self, table, key):
+        """Records the entry just written to table, then removes the
+        least recently used entries if the cache is over budget. Returns
+        the (table, key) of each entry removed
+        """
+        with self._lock:
+            touched, self._touched = self._touched, {}
+
+        with self._db.connection(True) as con:
+            con.executemany(
+                "update access set atime = ? where tbl = ? and key = ?",
+                [(atime, tbl, k) for (tbl, k), atime in touched.items()])
+            con.execute(
+                "insert or replace into access select ?, key, ?, length(value) from `%s` where key = ?" % table,
+                (table, time.time(), key))
+
+            entries, size = con.execute("select count(*), total(size) from access").fetchone()
+            if not self._over(entries, size, 1.0):
+                return []
+
+            # a tenth more than needed is removed, so the following
+            # writes do not each have to remove entries again
+            removed = []
+            for tbl, k, entry_size in con.execute("select tbl, key, size from access order by atime").fetchall():
+                if not self._over(entries, size, 0.9):
+                    break
+                removed.append((tbl, k))
+                entries -= 1
+                size -= entry_size or 0
+
+            con.executemany("delete from access where tbl = ? and key = ?", removed)
+            for tbl in self.tables:
+                keys = [(k,) for t, k in removed if t == tbl]
+                if keys:
+                    con.executemany("delete from `%s` where key = ?" % tbl, keys)
+        log().debug("Removed %d least recently used entries from the cache" % len(removed))
+        return removed
+
+    def _over(self, entries, size, fraction):
+        return ((self.max_entries is not None and entries > self.max_entries * fraction) or
+                (self.max_bytes is not None and size > self.max_bytes * fraction))
+
+
+def save_response(self, key, response):
+    """Replaces save_response of the sqlite cache of a session with a
+    _CacheBudget, keeping the cache within it
+    """
+    type(self).save_response(self, key, response)
+    self._budget.written('responses', key)
+
+
+def delete(self, key):
+    """Replaces delete of the sqlite cache of a session with a
+    _CacheBudget
+    """
+    type(self).delete(self, key)
+    self._budget.forget('responses', key)
+
+
+class ResponseCache(object):
+    """In-memory LRU cache of decoded JSON responses, checked before the
+    sqlite cache so hot responses are not read and decoded again.
+
+    Entries are keyed by the sqlite cache file and the create_key hash of
+    the request, and each stores when the response was cached, so every
+    Tvdb instance applies its own TTLs. The data is stored marshalled,
+    so each get returns a new copy (much faster than decoding the JSON
+    again) which callers may change without affecting the cache. When there are more than
+    max_entries entries, or their responses add up to more than max_bytes,
+    the least recently used are dropped. A single instance
+    (tvdb_api.response_cache) is shared by all Tvdb instances in the
+    process:
+
+    >>> tvdb_api.response_cache.configure(max_entries=5000, max_bytes=256 * 1024 * 1024)
+    """
+    def __init__(self, max_entries=1000, max_bytes=64 * 1024 * 1024):
+        self._lock = threading.Lock()
+        # key -> [marshalled data, time cached, size, last use]. Each use is numbered
+        # by a counter, and _uses maps the number of the last use of each
+        # entry back to its key, so the least recently used is found by
+        # counting up from _oldest (collections.OrderedDict needs 2.7)
+        self._entries = {}
+        self._uses = {}
+        self._counter = 0
+        self._oldest = 0
+        self._bytes = 0
+        self.configure(max_entries, max_bytes)
+
+    def configure(self, max_entries=1000, max_bytes=64 * 1024 * 1024):
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def get(self, key):
+        """Returns (a copy of the data, time cached) stored for key, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            del self._uses[entry[3]]
+            entry[3] = self._use(key)
+        return marshal.loads(entry[0]), entry[1]
+
+    def cached_at(self, key):
+        """Returns the time the response stored for key was cached, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def put(self, key, data, cached_at, size):
+        data = marshal.dumps(data)
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = [data, cached_at, size, self._use(key)]
+            self._bytes += size
+            self._evict()
+
+    def discard(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._uses.clear()
+            self._oldest = self._counter
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _use(self, key):
+        self._counter += 1
+        self._uses[self._counter] = key
+        return self._counter
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            del self._uses[entry[3]]
+            self._bytes -= entry[2]
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            while self._oldest not in self._uses:
+                self._oldest += 1
+            self._discard(self._uses[self._oldest])
+
+
+response_cache = ResponseCache()
+
+
 class Tvdb:
     """Create easy-to-use interface to name of season/episode name
     >>> t = Tvdb()
     >>> t['Scrubs'][1][24]['episodeName']
     u'My Last Day'
+
+    A single instance can be shared by many threads: every request uses
+    its own copy of the headers, shows are only added to self.shows once
+    they are fully built, and threads looking up the same show share
+    one login and download.
     """
+    # Seconds the cached responses of each endpoint stay fresh, see the
+    # cache_ttl argument
+    default_cache_ttl = {
+        'default': 21600,  # 6 hours
+        'search': 3600,
+        'series': 21600,
+        'episodes': 21600,
+        'summary': 21600,
+        'images': 3 * 24 * 60 * 60,
+        'actors': 3 * 24 * 60 * 60,
+        'updated': 3600,
+        'ended': 4 * 7 * 24 * 60 * 60,
+    }
+
     def __init__(self,
                  interactive=False,
                  select_first=False,
@@ -594,7 +1747,25 @@ class Tvdb:
                  username=None,
                  userkey=None,
                  forceConnect=False,
-                 dvdorder=False):
+                 dvdorder=False,
+                 workers=4,
+                 lazy_seasons=False,
+                 rate_limit=None,
+                 rate_burst=1,
+                 retries=3,
+                 retry_backoff=0.5,
+                 breaker_threshold=None,
+                 breaker_reset=None,
+                 connect_timeout=10,
+                 read_timeout=30,
+                 stale_while_revalidate=None,
+                 offline=False,
+                 cache_ttl=None,
+                 cache_sweep=1000,
+                 cache_shows=True,
+                 cache_max_size=None,
+                 cache_max_entries=None,
+                 max_shows=100):
 
         """interactive (True/False):
             When True, uses built-in console UI is used to select the correct show.
@@ -623,14 +1794,16 @@ class Tvdb:
 
         banners (True/False):
             Retrieves the banners for a show. These are accessed
-            via the _banners key of a Show(), for example:
+            via the _banners key of a Show(), and are only requested
+            the first time the key is accessed, for example:
 
             >>> Tvdb(banners=True)['scrubs']['_banners'].keys()
             [u'fanart', u'poster', u'seasonwide', u'season', u'series']
 
         actors (True/False):
             Retrieves a list of the actors for a show. These are accessed
-            via the _actors key of a Show(), for example:
+            via the _actors key of a Show(), and are only requested the
+            first time the key is accessed, for example:
 
             >>> t = Tvdb(actors=True)
             >>> t['scrubs']['_actors'][0]['name']
@@ -673,19 +1846,124 @@ class Tvdb:
             See http://thetvdb.com/ to register an account
 
         forceConnect (bool):
-            If true it will always try to connect to theTVDB.com even if we
-            recently timed out. By default it will wait one minute before
-            trying again, and any requests within that one minute window will
-            return an exception immediately.
+            If true it will always try to connect to theTVDB.com, even
+            when the circuit breaker is open because thetvdb.com failed
+            repeatedly. By default requests fail immediately with
+            tvdb_error while the breaker is open (see CircuitBreaker).
+
+        dvdorder (True/False):
+            Use the DVD season and episode numbers (when available) instead
+            of the aired order.
+
+        workers (int):
+            Number of threads used to make independent requests at the
+            same time: the series information, episodes, banners and
+            actors of a show, the images of each banner type, and the
+            remaining pages of a paginated result (such as a show's
+            episode list) once the first page has reported how many pages
+            there are. 1 makes every request one after another.
+
+        lazy_seasons (True/False):
+            When True, looking up a show only requests the series
+            information. The episodes of a season are requested (through
+            the episodes query endpoint) the first time the season is
+            accessed, so t['show'][3][5] only transfers season 3. Iterating
+            over a show, len() and search request all remaining episodes.
+
+        rate_limit (float/None):
+            When given, limits the requests sent to thetvdb.com to this
+            many per second. The limit is shared by all Tvdb instances
+            and threads in the process (see RateLimiter). Responses from
+            the cache do not count against it.
+
+        rate_burst (int):
+            Number of requests which may be sent at once before rate_limit
+            applies.
+
+        retries (int):
+            Number of times a request is retried after a connection
+            error, timeout or 5xx response, with exponential backoff.
+
+        retry_backoff (float):
+            Seconds to wait (at most, the delay is randomised) before the
+            first retry, doubled for every further retry.
+
+        breaker_threshold (int/None):
+            When given, the number of failed requests in a row after which
+            the circuit breaker opens. Like rate_limit, the circuit
+            breaker is shared by the whole process. Defaults to 5.
+
+        breaker_reset (float/None):
+            When given, the number of seconds the circuit breaker stays
+            open before a request is let through to probe thetvdb.com.
+            Defaults to 60.
+
+        connect_timeout (float/None):
+            Seconds to wait for a connection to thetvdb.com. None waits
+            forever.
+
+        read_timeout (float/None):
+            Seconds to wait for thetvdb.com to send data once connected.
+            None waits forever. An overall limit for a lookup can be set
+            using get(key, deadline).
+
+        stale_while_revalidate (float/None):
+            When given, cached responses which expired at most this many
+            seconds ago are used straight away, while background threads
+            (at most workers of them) request them again for next time.
+            Only applies to the default sqlite cache (cache=True or a
+            path).
+
+        offline (True/False):
+            When True, thetvdb.com is never contacted (not even to log in).
+            Everything is read from the cache, however old, and
+            tvdb_notcached is raised for anything which is not cached.
+            Useful with a cache directory copied from another machine:
+
+            >>> t = Tvdb(cache='/path/to/cache', offline=True) #doctest: +SKIP
+
+        cache_ttl (dict):
+            Seconds the cached responses of each kind of request stay
+            fresh, updating the defaults in Tvdb.default_cache_ttl:
+            'search', 'series' (information), 'episodes', 'summary',
+            'images', 'actors' and 'updated' (see sync). Series,
+            episodes and summaries of shows whose status is Ended use
+            'ended' instead. 'default' is used for anything else:
+
+            >>> t = Tvdb(cache_ttl={'search': 600, 'ended': 90 * 24 * 60 * 60})
+
+        cache_sweep (int):
+            Responses too old to be used are removed from the sqlite cache
+            by a background thread, which examines this many responses
+            every 10 minutes, starting 10 minutes after the first request
+            (continuing where the last sweep stopped, even in another
+            process). Each response expires by the TTL of its endpoint
+            (see cache_ttl). 0 disables the thread, leaving it to
+            expire_cache() calls.
+
+        cache_shows (True/False):
+            When True, each show is also stored fully built in the sqlite
+            cache (separately for each language and episode order), so a
+            new process gets it back without decoding every response and
+            building the seasons and episodes again. It is rebuilt when
+            the series or episodes TTL has passed.
+
+        cache_max_size (int/None), cache_max_entries (int/None):
+            Limit the sqlite cache to this many bytes and/or entries
+            (responses and built shows). Whenever a write goes over the
+            limit, the least recently used entries are removed, down to
+            90% of it:
+
+            >>> t = Tvdb(cache_max_size=50 * 1024 * 1024)
+
+        max_shows (int/None):
+            Number of shows kept in memory (in self.shows). Older shows
+            are dropped, and loaded again (from the cache if enabled) the
+            next time they are looked up. None keeps every show, for
+            example when prefetching a large library.
         """
 
-        global lastTimeout
-
-        # if we're given a lastTimeout that is less than 1 min just give up
-        if not forceConnect and lastTimeout is not None and datetime.datetime.now() - lastTimeout < datetime.timedelta(minutes=1):
-            raise tvdb_error("We recently timed out, so giving up early this time")
-
-        self.shows = ShowContainer()  # Holds all Show classes
+        self.shows = ShowContainer(max_shows)  # Holds all Show classes
         self.corrections = {}  # Holds show-name to show_id mapping
 
         self.config = {}
@@ -715,33 +1993,56 @@ class Tvdb:
 
         self.config['dvdorder'] = dvdorder
 
+        self.config['workers'] = workers
+
+        self.config['lazy_seasons'] = lazy_seasons
+
+        if rate_limit is not None:
+            rate_limiter.configure(rate_limit, rate_burst)
+
+        if breaker_threshold is not None or breaker_reset is not None:
+            circuit_breaker.configure(
+                breaker_threshold or circuit_breaker.failure_threshold,
+                breaker_reset if breaker_reset is not None else circuit_breaker.reset_timeout)
+
+        self.config['retries'] = retries
+        self.config['retry_backoff'] = retry_backoff
+        self.config['force_connect'] = forceConnect
+        self.config['timeout'] = (connect_timeout, read_timeout)
+        self.config['stale_while_revalidate'] = stale_while_revalidate
+        self.config['offline'] = offline
+
+        self.config['cache_ttl'] = dict(self.default_cache_ttl)
+        self.config['cache_ttl'].update(cache_ttl or {})
+
+        self.config['cache_sweep'] = cache_sweep
+        self.config['cache_sweep_interval'] = 600
+        self.config['cache_shows'] = cache_shows
+        self.config['cache_max_size'] = cache_max_size
+        self.config['cache_max_entries'] = cache_max_entries
+
+        # Path (without extension) of the files kept in the cache
+        # directory: the sqlite cache itself and the login token
+        self.config['cache_location'] = None
+
+        # The session is only created (and the sqlite cache opened) when
+        # it is first used, see the session property
+        self._cache = cache
+        self._session = None
+        self._sessionLock = threading.Lock()
+
         if cache is True:
-            self.session = requests_cache.CachedSession(
-                expire_after=21600,  # 6 hours
-                backend='sqlite',
-                cache_name=self._getTempDir(),
-                include_get_headers=True
-                )
-            self.session.cache.create_key = types.MethodType(create_key, self.session.cache)
-            self.session.remove_expired_responses()
+            self.config['cache_location'] = self._getTempDir()
             self.config['cache_enabled'] = True
         elif cache is False:
-            self.session = requests.Session()
             self.config['cache_enabled'] = False
         elif isinstance(cache, str):
             # Specified cache path
-            self.session = requests_cache.CachedSession(
-                expire_after=21600,  # 6 hours
-                backend='sqlite',
-                cache_name=os.path.join(cache, "tvdb_api"),
-                include_get_headers=True
-                )
-            self.session.cache.create_key = types.MethodType(create_key, self.session.cache)
-            self.session.remove_expired_responses()
+            self.config['cache_location'] = os.path.join(cache, "tvdb_api")
         else:
-            self.session = cache
+            self._session = cache
             try:
-                self.session.get
+                self._session.get
             except AttributeError:
                 raise ValueError("cache argument must be True/False, string as cache path or requests.Session-type object (e.g from requests_cache.CachedSession)")
 
@@ -791,9 +2092,17 @@ class Tvdb:
         self.config['base_url'] = "http://thetvdb.com"
         self.config['api_url'] = "https://api.thetvdb.com"
 
+        self.config['url_login'] = u"%(api_url)s/login" % self.config
+        self.config['url_refreshToken'] = u"%(api_url)s/refresh_token" % self.config
+
+        # Tokens are refreshed when they expire within this many seconds
+        self.config['token_refresh_margin'] = 3600
+
         self.config['url_getSeries'] = u"%(api_url)s/search/series?name=%%s" % self.config
 
         self.config['url_epInfo'] = u"%(api_url)s/series/%%s/episodes" % self.config
+        self.config['url_epQuery'] = u"%(api_url)s/series/%%s/episodes/query?%%s" % self.config
+        self.config['url_epSummary'] = u"%(api_url)s/series/%%s/episodes/summary" % self.config
 
         self.config['url_seriesInfo'] = u"%(api_url)s/series/%%s" % self.config
         self.config['url_actorsInfo'] = u"%(api_url)s/series/%%s/actors" % self.config
@@ -802,9 +2111,204 @@ class Tvdb:
         self.config['url_seriesBannerInfo'] = u"%(api_url)s/series/%%s/images/query?keyType=%%s" % self.config
         self.config['url_artworkPrefix'] = u"%(base_url)s/banners/%%s" % self.config
 
-        self.__authorized = False
+        self.config['url_updated'] = u"%(api_url)s/updated/query?fromTime=%%s&toTime=%%s" % self.config
+
+        self._authorized = False
+        self._authLock = threading.Lock()
+        self._tokenExpires = None
+        # incremented whenever the token changes, see _reauthorize
+        self._tokenGeneration = 0
+        # concurrent lookups of the same show name, series ID or URL
+        # share a single request
+        self._flights = SingleFlight()
+        self._showsLock = threading.RLock()
+        # threads making independent requests, see _executor
+        self._pool = None
+        # time of the last sync, when there is no cache directory to store it in
+        self._lastSyncTime = None
+        # (status, time it was seen) of each series, used to pick the cache TTL
+        self._seriesStatuses = {}
+        # table of built shows in the sqlite cache, see _showSnapshots
+        self._snapshots = None
+        # see _keySession
+        self._fakeSessionForKey = None
         self.headers = {'Content-Type': 'application/json', 'Accept': 'application/json', 'Accept-Language': self.config['language']}
 
+    @property
+    def session(self):
+        """The requests session used to talk to thetvdb.com, created on
+        first use
+        """
+        if self._session is None:
+            with self._sessionLock:
+                if self._session is None:
+                    self._session = self._newSession()
+        return self._session
+
+    def _executor(self):
+        """Returns the ThreadPoolExecutor of config['workers'] threads
+        shared by every _mapParallel call of this instance, nested ones
+        included, created on first use. None when requests are made one
+        after another
+        """
+        workers = self.config['workers']
+        if ThreadPoolExecutor is None or workers is None or workers <= 1:
+            return None
+        if self._pool is None:
+            with self._sessionLock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=workers)
+        return self._pool
+
+    def _newSession(self):
+        """Returns the session for the cache argument given to __init__,
+        with a TvdbAdapter mounted
+        """
+        if self._cache is False:
+            session = requests.Session()
+        else:
+            session = self._createSession()
+
+        adapter = TvdbAdapter(
+            retries=self.config['retries'],
+            backoff=self.config['retry_backoff'],
+            force_connect=self.config['force_connect'])
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _createSession(self):
+        """Returns the CachedSession storing responses in the sqlite file
+        at config['cache_location']
+        """
+        session = requests_cache.CachedSession(
+            expire_after=self.config['cache_ttl']['default'],
+            backend='sqlite',
+            cache_name=self.config['cache_location'],
+            include_get_headers=True
+            )
+        session.cache.create_key = types.MethodType(create_key, session.cache)
+        session.send = types.MethodType(send, session)
+        session._expireAfter = self._cacheExpiry
+
+        session._maxStale = None
+        if self.config['stale_while_revalidate'] is not None:
+            session._maxStale = datetime.timedelta(seconds=self.config['stale_while_revalidate'])
+        session._refreshing = set()
+        session._refreshQueue = []
+        session._refreshWorkers = 0
+        session._refreshThreads = max(1, self.config['workers'] or 1)
+        session._refreshLock = threading.Lock()
+        session._refreshHeaders = self._authHeaders
+        session._cacheLocation = self.config['cache_location']
+        session._responseChanged = self._responseChanged
+
+        if self.config['cache_max_size'] is not None or self.config['cache_max_entries'] is not None:
+            session.cache._budget = _CacheBudget(
+                session.cache.responses, self.config['cache_max_size'], self.config['cache_max_entries'])
+            session.cache.save_response = types.MethodType(save_response, session.cache)
+            session.cache.delete = types.MethodType(delete, session.cache)
+
+        if self.config['cache_sweep'] and not self.config['offline']:
+            # when offline, expired responses are all there is to use
+            _startSweeper(self, self.config['cache_sweep_interval'])
+        return session
+
+    def _maxAge(self, response):
+        """Returns how long after it was cached response can no longer be
+        used, as a timedelta: the TTL of its endpoint (see _cacheExpiry),
+        plus the time it may be used while stale
+        """
+        stale = datetime.timedelta(seconds=self.config['stale_while_revalidate'] or 0)
+        request = getattr(response, 'request', None)
+        if request is None:
+            return datetime.timedelta(seconds=max(self.config['cache_ttl'].values())) + stale
+        return self._cacheExpiry(request) + stale
+
+    def expire_cache(self, limit=None):
+        """Removes cached responses which are too old to be used. At most
+        limit responses (all if None) are examined, starting where the
+        previous call (or the background sweeper) stopped, so this can
+        be run regularly to spread the work. Returns the number removed.
+
+        >>> Tvdb().expire_cache(limit=1000) #doctest: +SKIP
+        12
+        """
+        if self.config['cache_location'] is None or getattr(self.session, 'cache', None) is None:
+            return 0
+        if limit is not None:
+            return _sweepCache(self.session.cache, self.config['cache_location'], self._maxAge, limit)
+
+        removed, after = 0, None
+        while True:
+            count, after = _expireEntries(self.session.cache, self._maxAge, after, 1000)
+            removed += count
+            if after is None:
+                return removed
+
+    def _cacheExpiry(self, request):
+        """Returns how long the cached response to request stays fresh,
+        following config['cache_ttl']
+        """
+        return self._ttl(request.url, request.headers.get('Accept-Language'))
+
+    def _ttl(self, url, language):
+        """Returns how long the cached response to url in language stays
+        fresh, as a timedelta
+        """
+        name, sid = _endpoint(url)
+        if name in ['series', 'episodes', 'summary'] and sid is not None:
+            status = self._seriesStatus(sid, language)
+            if status is not None and status.lower() == 'ended':
+                name = 'ended'
+        ttl = self.config['cache_ttl'].get(name, self.config['cache_ttl']['default'])
+        return datetime.timedelta(seconds=ttl)
+
+    def _seriesStatus(self, sid, language):
+        """Returns the status ('Ended', 'Continuing') of series sid, from
+        the series information loaded or cached, or None.
+
+        The answer, even None, is remembered for the 'series' TTL, so the
+        pages of one show do not each decode the cached series
+        information
+        """
+        known = self._seriesStatuses.get(sid)
+        if known is not None and time.time() - known[1] < self.config['cache_ttl']['series']:
+            return known[0]
+
+        status = None
+        key = self._cacheKey(self.config['url_seriesInfo'] % sid, language or self.config['language'])
+        cached = None
+        if key is not None:
+            cached = response_cache.get((self.config['cache_location'], key))
+        if cached is not None:
+            status = (cached[0].get('data') or {}).get('status')
+        elif key is not None:
+            try:
+                response, created = self.session.cache.get_response_and_time(key)
+                if response is not None:
+                    status = (response.json().get('data') or {}).get('status')
+            except (ValueError, AttributeError, TypeError):
+                pass
+        self._setSeriesStatus(sid, status)
+        return status
+
+    def _setSeriesStatus(self, sid, status):
+        """Remembers status as the status of series sid (see _seriesStatus)
+        """
+        self._seriesStatuses[sid] = (status, time.time())
+
+    def _noteSeriesStatus(self, url, r):
+        """Updates the status of the series when r is a response to its
+        series information request, so a show revived or ended since it
+        was first seen gets the TTL of its new status
+        """
+        name, sid = _endpoint(url)
+        if name == 'series' and sid is not None and isinstance(r, dict):
+            status = (r.get('data') or {}).get('status')
+            if status is not None:
+                self._setSeriesStatus(sid, status)
+
     def _getTempDir(self):
         """Returns the [system temp dir]/tvdb_api-u501 (or
         tvdb_api-myuser)
@@ -821,36 +2325,226 @@ class Tvdb:
         return os.path.join(tempfile.gettempdir(), "tvdb_api-%s" % (uid))
 
     def _loadUrl(self, url, data=None, recache=False, language=None):
-        """Return response from The TVDB API"""
+        """Return response from The TVDB API
+
+        Paginated results are combined into a single list. The first page
+        tells us the number of the last page, so the remaining pages are
+        requested concurrently (using up to config['workers'] threads) and
+        joined in page order.
+        """
 
+        language = self._checkLanguage(language)
+
+        r_data, links = self._loadPage(url, language)
+
+        if data and isinstance(data, list):
+            data.extend(r_data)
+        else:
+            data = r_data
+
+        if not _nextPage(links):
+            return data
+
+        data = list(data or [])
+        pages = _remainingPages(url, links, data)
+        try:
+            page_urls = next(pages)
+            while True:
+                page_urls = pages.send(_mapParallel(
+                    lambda page_url: self._loadPage(page_url, language),
+                    page_urls,
+                    self._executor()))
+        except StopIteration:
+            pass
+
+        return data
+
+    def _iterPages(self, url, language=None):
+        """Yields the data of each page of a paginated result as soon as
+        it is loaded. The next page is only requested once the previous
+        one has been consumed, following links['next'] without recursion
+        """
+        language = self._checkLanguage(language)
+
+        page_data, links = self._loadPage(url, language)
+        while True:
+            yield page_data or []
+
+            next_page = _nextPage(links)
+            if not next_page:
+                break
+            page_data, links = self._loadPage(_pageUrl(url, next_page), language)
+
+    def _checkLanguage(self, language):
+        """Returns language, or the configured language if it is None,
+        raising ValueError if it is not a valid language
+        """
         if not language:
             language = self.config['language']
         if language not in self.config['valid_languages']:
             raise ValueError("Invalid language %s, options are: %s" % (
                 language, self.config['valid_languages']
             ))
-        self.headers['Accept-Language'] = language
+        return language
+
+    def _loadPage(self, url, language):
+        """Makes a single request to The TVDB API, returns a tuple of the
+        response data and its pagination links. Threads loading the same
+        url at the same time share one request
+        """
+        return self._flights.do(('url', url, language), lambda: self._requestPage(url, language))
+
+    def _requestPage(self, url, language):
+        _timeLeft()
+
+        if self.config['offline']:
+            return self._parseResponse(self._loadCached(url, language), url, language)
+
+        memory_key = self._responseCacheKey(url, language)
+        if memory_key is not None:
+            cached = response_cache.get(memory_key)
+            if cached is not None:
+                data, cached_at = cached
+                if datetime.datetime.utcnow() - cached_at <= self._ttl(url, language):
+                    log().debug("Using %s from memory" % url)
+                    self._touchCached('responses', memory_key[1])
+                    self._noteSeriesStatus(url, data)
+                    return self._parseResponse(data, url, language)
 
-        # TODO: обрабатывать исключения (Handle Exceptions)
-        # TODO: обновлять токен (Update Token)
         # encoded url is used for hashing in the cache so
         # python 2 and 3 generate the same hash
-        if not self.__authorized:
+        if not self._authorized:
             # only authorize of we haven't before and we
             # don't have the url in the cache
-            fake_session_for_key = requests.Session()
-            fake_session_for_key.headers['Accept-Language'] = language
-            cache_key = None
-            try:
-                # in case the session class has no cache object, fail gracefully
-                cache_key = self.session.cache.create_key(fake_session_for_key.prepare_request(requests.Request('GET', url)))
-            except:
-                pass
+            cache_key = self._cacheKey(url, language)
             if not cache_key or not self.session.cache.has_key(cache_key):
-                self.authorize()
-
-        response = self.session.get(url, headers=self.headers)
+                with self._authLock:
+                    # pages loaded concurrently must only log in once
+                    if not self._authorized:
+                        self.authorize()
+        elif self._tokenExpiresSoon():
+            with self._authLock:
+                if self._tokenExpiresSoon():
+                    self._refreshToken()
+
+        token_generation = self._tokenGeneration
+        response = self.session.get(url, headers=self._requestHeaders(language), timeout=self.config['timeout'])
         r = response.json()
+
+        if self._isNotAuthorized(response.status_code, r):
+            # The token expired or was revoked: authorize again (once, no
+            # matter how many threads got here with the same token) and
+            # retry the request with the new token
+            log().debug("Not authorized to load %s, authorizing again" % url)
+            self._reauthorize(token_generation)
+            response = self.session.get(url, headers=self._requestHeaders(language), timeout=self.config['timeout'])
+            r = response.json()
+
+        if memory_key is not None and response.status_code == 200:
+            response_cache.put(
+                memory_key, r,
+                getattr(response, 'cached_at', None) or datetime.datetime.utcnow(),
+                len(response.content))
+
+        self._noteSeriesStatus(url, r)
+        return self._parseResponse(r, url, language)
+
+    def _touchCached(self, table, key):
+        """Notes that the cached entry key of table was used, when the
+        cache size is limited (see cache_max_size)
+        """
+        budget = getattr(getattr(self.session, 'cache', None), '_budget', None)
+        if budget is not None:
+            budget.touch(table, key)
+
+    def _responseCacheKey(self, url, language):
+        """Returns the key of url in language in response_cache, or None
+        if the session is not one of the sqlite caches created by Tvdb
+        """
+        if self.config['cache_location'] is None:
+            return None
+        key = self._cacheKey(url, language)
+        if key is None:
+            return None
+        return (self.config['cache_location'], key)
+
+    def _cacheKey(self, url, language):
+        """Returns the key of the cached response to a GET of url in
+        language, or None if the session has no cache
+        """
+        if self.config['cache_location'] is not None:
+            # one of the sqlite caches created by Tvdb, using create_key
+            return _getKey(url, language)
+
+        try:
+            # in case the session class has no cache object, fail gracefully
+            return self.session.cache.create_key(self._keySession().prepare_request(
+                requests.Request('GET', url, headers={'Accept-Language': language})))
+        except:
+            return None
+
+    def _keySession(self):
+        """Returns a plain session used (but never changed, so it can be
+        shared by threads) to prepare requests for create_key
+        """
+        if self._fakeSessionForKey is None:
+            self._fakeSessionForKey = requests.Session()
+        return self._fakeSessionForKey
+
+    def _loadCached(self, url, language):
+        """Returns the decoded JSON of the cached response to url in
+        language, even if it expired, raising tvdb_notcached if there is
+        none
+        """
+        key = self._cacheKey(url, language)
+        response = None
+        if key is not None:
+            response, created = self.session.cache.get_response_and_time(key)
+        if response is None:
+            raise tvdb_notcached("%s (language %s) is not in the cache" % (url, language))
+        log().debug("offline: using cached %s" % url)
+        return response.json()
+
+    def _authHeaders(self):
+        """Returns the Authorization header, logging in first if needed.
+        Used to revalidate stale responses in the background
+        """
+        if not self._authorized:
+            with self._authLock:
+                if not self._authorized:
+                    self.authorize()
+        return {'Authorization': self.headers['Authorization']}
+
+    def _requestHeaders(self, language):
+        """Returns a copy of self.headers for a request in language.
+        self.headers itself is only ever replaced (see _useToken), never
+        changed, so threads can share the instance
+        """
+        headers = dict(self.headers)
+        headers['Accept-Language'] = language
+        return headers
+
+    def _isNotAuthorized(self, status_code, r):
+        error = r.get('Error') if isinstance(r, dict) else None
+        return status_code == 401 or (error is not None and error.lower() == u'not authorized')
+
+    def _reauthorize(self, token_generation):
+        """Replaces the token which was in use when token_generation was
+        read, unless another thread already replaced it.
+
+        The token was refused, so it is not refreshed or read back from
+        the cache directory: it is forgotten, and we log in again
+        """
+        with self._authLock:
+            if self._tokenGeneration != token_generation:
+                return
+            self._forgetStoredToken()
+            self._login()
+
+    def _parseResponse(self, r, url, language):
+        """Checks the decoded JSON response r of url for errors, returns
+        a tuple of the response data and its pagination links
+        """
         log().debug("loadurl: %s lid=%s" % (url, language))
         log().debug("response:")
         log().debug(r)
@@ -860,11 +2554,11 @@ class Tvdb:
         links = r.get('links')
 
         if error:
-            if error == u'Resource not found':
+            if error == u'Resource not found' or error.startswith(u'No results for your query'):
                 # raise(tvdb_resourcenotfound)
                 # handle no data at a different level so it is more specific
                 pass
-            elif error == u'Not Authorized':
+            elif error.lower() == u'not authorized':
                 raise(tvdb_notauthorized)
             elif error.startswith(u"ID: ") and error.endswith("not found"):
                 # FIXME: Refactor error out of in this method
@@ -879,29 +2573,140 @@ class Tvdb:
                 # there is just less data
                 pass
 
-        if data and isinstance(data, list):
-            data.extend(r_data)
-        else:
-            data = r_data
+        return r_data, links
 
-        if links and links['next']:
-            url = url.split('?')[0]
-            _url = url + "?page=%s" % links['next']
-            self._loadUrl(_url, data)
+    def authorize(self):
+        """Logs in to thetvdb.com, unless a token stored in the cache
+        directory by an earlier instance (for the same credentials) is
+        still valid. A stored token which is about to expire is refreshed
+        """
+        stored = self._loadStoredToken()
+        if stored is not None:
+            log().debug("auth using stored token")
+            self._useToken(*stored)
+            if self._tokenExpiresSoon():
+                self._refreshToken()
+            return
 
-        return data
+        self._login()
 
-    def authorize(self):
+    def _login(self):
         log().debug("auth")
-        r = self.session.post('https://api.thetvdb.com/login', json=self.config['auth_payload'], headers=self.headers)
-        r_json = r.json()
+        # logging in must not depend on the old token
+        headers = dict(self.headers)
+        headers.pop('Authorization', None)
+        r = self.session.post(self.config['url_login'], json=self.config['auth_payload'], headers=headers,
+                              timeout=self.config['timeout'])
+        self._setToken(r.json())
+
+    def _refreshToken(self):
+        """Swaps the current token for a new one using the refresh_token
+        endpoint, logging in again if that fails
+        """
+        log().debug("refreshing token")
+        try:
+            # a cached response would hand back the old token, so the
+            # request is sent past the cache (without disabling it, which
+            # would affect the requests of every other thread)
+            request = self.session.prepare_request(
+                requests.Request('GET', self.config['url_refreshToken'], headers=self.headers))
+            r = requests.Session.send(self.session, request, timeout=self.config['timeout'])
+            self._setToken(r.json())
+        except (ValueError, tvdb_exception, requests.exceptions.RequestException) as e:
+            log().debug("refreshing token failed (%s), logging in" % e)
+            self._login()
+
+    def _setToken(self, r_json):
+        """Uses the token from the decoded JSON login (or refresh_token)
+        response r_json for all further requests, and stores it in the
+        cache directory for later instances
+        """
         error = r_json.get('Error')
         if error:
-            if error == u'Not Authorized':
+            if error.lower() == u'not authorized':
                 raise(tvdb_notauthorized)
         token = r_json.get('token')
-        self.headers['Authorization'] = "Bearer %s" % text_type(token)
-        self.__authorized = True
+        if not token:
+            raise tvdb_notauthorized("No token in response from thetvdb.com")
+
+        # Tokens are valid for 24 hours if they do not say otherwise
+        expires = _tokenExpiry(token) or time.time() + 24 * 60 * 60
+        self._useToken(token, expires)
+        self._storeToken(token, expires)
+
+    def _useToken(self, token, expires):
+        headers = dict(self.headers)
+        headers['Authorization'] = "Bearer %s" % text_type(token)
+        self.headers = headers
+        self._tokenExpires = expires
+        self._tokenGeneration += 1
+        self._authorized = True
+
+    def _tokenExpiresSoon(self):
+        return (self._authorized and self._tokenExpires is not None and
+                self._tokenExpires - time.time() < self.config['token_refresh_margin'])
+
+    def _tokenFile(self):
+        if self.config['cache_location'] is None:
+            return None
+        return self.config['cache_location'] + ".token"
+
+    def _tokenKey(self):
+        """Identifies the credentials a stored token belongs to, without
+        storing the credentials themselves
+        """
+        payload = json.dumps(self.config['auth_payload'], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _readTokenFile(self):
+        try:
+            with open(self._tokenFile()) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _loadStoredToken(self):
+        """Returns (token, expiry time) stored for our credentials, if
+        there is one which has not expired yet
+        """
+        if self._tokenFile() is None:
+            return None
+        stored = self._readTokenFile().get(self._tokenKey())
+        if not stored or stored.get('expires', 0) <= time.time():
+            return None
+        return stored['token'], stored['expires']
+
+    def _storeToken(self, token, expires):
+        """Saves token in the cache directory, readable only by the
+        current user
+        """
+        filename = self._tokenFile()
+        if filename is None:
+            return
+        tokens = self._readTokenFile()
+        tokens = dict((k, v) for (k, v) in tokens.items() if v.get('expires', 0) > time.time())
+        tokens[self._tokenKey()] = {'token': token, 'expires': expires}
+
+        try:
+            _writeJson(filename, tokens)
+        except (IOError, OSError) as e:
+            log().warning("Could not store token in %s: %s" % (filename, e))
+
+    def _forgetStoredToken(self):
+        """Removes the token stored in the cache directory for our
+        credentials, so later instances do not use it either
+        """
+        filename = self._tokenFile()
+        if filename is None:
+            return
+        tokens = self._readTokenFile()
+        if tokens.pop(self._tokenKey(), None) is None:
+            return
+
+        try:
+            _writeJson(filename, tokens)
+        except (IOError, OSError) as e:
+            log().warning("Could not remove token from %s: %s" % (filename, e))
 
     def _getetsrc(self, url, language=None):
         """Loads a URL using caching, returns an ElementTree of the source
@@ -910,7 +2715,7 @@ class Tvdb:
 
         return src
 
-    def _setItem(self, sid, seas, ep, attrib, value):
+    def _setItem(self, sid, seas, ep, attrib, value, show=None):
         """Creates a new episode, creating Show(), Season() and
         Episode()s as required. Called by _getShowData to populate show
 
@@ -924,21 +2729,31 @@ class Tvdb:
         The problem is that calling tvdb[1][24]['episodename'] = "name"
         calls __getitem__ on tvdb[1], there is no way to check if
         tvdb.__dict__ should have a key "1" before we auto-create it
-        """
-        if sid not in self.shows:
-            self.shows[sid] = Show()
-        if seas not in self.shows[sid]:
-            self.shows[sid][seas] = Season(show=self.shows[sid])
-        if ep not in self.shows[sid][seas]:
-            self.shows[sid][seas][ep] = Episode(season=self.shows[sid][seas])
-        self.shows[sid][seas][ep][attrib] = value
 
-    def _setShowData(self, sid, key, value):
-        """Sets self.shows[sid] to a new Show instance, or sets the data
+        When show is given, the episode is added to it instead of
+        self.shows[sid]
         """
-        if sid not in self.shows:
-            self.shows[sid] = Show()
-        self.shows[sid].data[key] = value
+        if show is None:
+            show = self._getOrCreateShow(sid)
+        if seas not in show:
+            show[seas] = Season(show=show)
+        if ep not in show[seas]:
+            show[seas][ep] = Episode(season=show[seas])
+        show[seas][ep][attrib] = value
+
+    def _setShowData(self, sid, key, value, show=None):
+        """Sets self.shows[sid] (or show) to a new Show instance, or sets
+        the data
+        """
+        if show is None:
+            show = self._getOrCreateShow(sid)
+        show.data[key] = value
+
+    def _getOrCreateShow(self, sid):
+        with self._showsLock:
+            if sid not in self.shows:
+                self.shows[sid] = Show()
+            return self.shows[sid]
 
     def search(self, series):
         """This searches TheTVDB.com for the series name
@@ -947,12 +2762,19 @@ class Tvdb:
         series = url_quote(series.encode("utf-8"))
         log().debug("Searching for show %s" % series)
         seriesEt = self._getetsrc(self.config['url_getSeries'] % (series))
+        return self._parseSearchResults(seriesEt)
+
+    def _parseSearchResults(self, seriesEt):
+        """Returns the list of series from search response seriesEt
+        """
         if not seriesEt:
             log().debug('Series result returned zero')
             raise tvdb_shownotfound("Show-name search returned zero results (cannot find show on TVDB)")
 
         allSeries = []
         for series in seriesEt:
+            # the response may be shared through response_cache
+            series = dict(series)
             series['lid'] = self.config['langabbv_to_id'][self.config['language']]
             series['language'] = self.config['language']
             log().debug('Found series %(seriesName)s' % series)
@@ -967,7 +2789,11 @@ class Tvdb:
         BaseUI is used to select the first result.
         """
         allSeries = self.search(series)
+        return self._selectSeries(allSeries)
 
+    def _selectSeries(self, allSeries):
+        """Picks one of the search results allSeries using the configured UI
+        """
         if self.config['custom_ui'] is not None:
             log().debug("Using custom UI %s" % (repr(self.config['custom_ui'])))
             ui = self.config['custom_ui'](config=self.config)
@@ -999,11 +2825,30 @@ class Tvdb:
 
         This interface will be improved in future versions.
         """
+        banners = self._getBanners(sid)
+        if banners:
+            self._setShowData(sid, "_banners", banners)
+
+    def _getBanners(self, sid):
+        """Requests the banners of a show and returns them as a dict, in
+        the layout described in _parseBanners. The images of each keyType
+        are requested at the same time
+        """
         log().debug('Getting season banners for %s' % (sid))
-        bannersEt = self._getetsrc(self.config['url_seriesBanner'] % sid)
+        bannersEt = self._getetsrc(self.config['url_seriesBanner'] % sid) or {}
+        banner_types = list(bannersEt.keys())
+        all_banners_info = _mapParallel(
+            lambda cur_banner: self._getetsrc(self.config['url_seriesBannerInfo'] % (sid, cur_banner)),
+            banner_types,
+            self._executor())
+        return self._buildBanners(all_banners_info)
+
+    def _buildBanners(self, all_banners_info):
+        """Builds the banners dict from the image query responses of each
+        keyType
+        """
         banners = {}
-        for cur_banner in bannersEt.keys():
-            banners_info = self._getetsrc(self.config['url_seriesBannerInfo'] % (sid, cur_banner))
+        for banners_info in all_banners_info:
             for banner_info in banners_info:
                 bid = banner_info.get('id')
                 btype = banner_info.get('keyType')
@@ -1030,7 +2875,7 @@ class Tvdb:
                         banners[btype][btype2][bid][new_key] = new_url
 
             banners[btype]['raw'] = banners_info
-            self._setShowData(sid, "_banners", banners)
+        return banners
 
     def _parseActors(self, sid):
         """Parsers actors XML, from
@@ -1056,11 +2901,21 @@ class Tvdb:
         Any key starting with an underscore has been processed (not the raw
         data from the XML)
         """
+        self._setShowData(sid, '_actors', self._getActors(sid))
+
+    def _getActors(self, sid):
+        """Requests the actors of a show and returns them as an Actors
+        list (see _parseActors)
+        """
         log().debug("Getting actors for %s" % (sid))
         actorsEt = self._getetsrc(self.config['url_actorsInfo'] % (sid))
+        return self._buildActors(actorsEt)
 
+    def _buildActors(self, actorsEt):
+        """Builds an Actors list from the actors response actorsEt
+        """
         cur_actors = Actors()
-        for curActorItem in actorsEt:
+        for curActorItem in actorsEt or []:
             curActor = Actor()
             for curInfo in curActorItem.keys():
                 tag = curInfo
@@ -1070,7 +2925,7 @@ class Tvdb:
                         value = self.config['url_artworkPrefix'] % (value)
                 curActor[tag] = value
             cur_actors.append(curActor)
-        self._setShowData(sid, '_actors', cur_actors)
+        return cur_actors
 
     def _getShowData(self, sid, language):
         """Takes a series ID, gets the epInfo URL and parses the TVDB
@@ -1090,11 +2945,183 @@ class Tvdb:
                 )
             )
 
+        show = self._loadSnapshot(sid, language)
+        if show is not None:
+            self._installShow(sid, show)
+            return
+
+        # The results are only added to the show once every request has
+        # finished, so the worker threads never modify self.shows
+        log().debug('Getting all series data and episodes of %s' % (sid))
+        show_requests = self._showRequests(sid, language)
+        results = dict(zip(
+            [name for name, url, url_language in show_requests],
+            _mapParallel(
+                lambda request: self._getetsrc(request[1], language=request[2]),
+                show_requests,
+                self._executor())))
+
+        # Banners and actors are only requested when first accessed
+        if self.config['banners_enabled']:
+            results['_banners'] = LazyData(lambda: self._getBanners(sid))
+        if self.config['actors_enabled']:
+            results['_actors'] = LazyData(lambda: self._getActors(sid))
+
+        show = self._buildShow(sid, results)
+        show._tvdb = self
+        show._allSeasonsLoaded = not self.config['lazy_seasons']
+        self._installShow(sid, show)
+        self._storeSnapshot(sid, language, show)
+
+    def _showRequests(self, sid, language):
+        """Returns (name, url, language) of each request the show sid is
+        built from: the series information and (unless seasons are loaded
+        lazily) the episodes. They do not depend on each other, so they
+        are made at the same time
+        """
+        show_requests = [('series', self.config['url_seriesInfo'] % sid, None)]
+        if not self.config['lazy_seasons']:
+            show_requests.append(('episodes', self.config['url_epInfo'] % sid, language))
+        return show_requests
+
+    def _showSnapshots(self):
+        """Returns the table of built shows (see cache_shows) in the
+        sqlite cache, or None if they are not cached
+        """
+        if not self.config['cache_shows'] or self.config['cache_location'] is None:
+            return None
+        if self._snapshots is None:
+            responses = getattr(getattr(self.session, 'cache', None), 'responses', None)
+            if getattr(responses, 'filename', None) is None:
+                return None
+            self._snapshots = requests_cache.backends.storage.dbdict.DbPickleDict(
+                responses.filename, 'shows')
+        return self._snapshots
+
+    def _snapshotKey(self, sid, language, dvdorder=None):
+        if dvdorder is None:
+            dvdorder = self.config['dvdorder']
+        return "%s:%s:%s" % (sid, language, 'dvd' if dvdorder else 'aired')
+
+    def _loadSnapshot(self, sid, language):
+        """Returns the show sid built in language, from the table of built
+        shows, or None if it is not there or its TTL has passed
+        """
+        snapshots = self._showSnapshots()
+        if snapshots is None:
+            return None
+        key = self._snapshotKey(sid, language)
+        try:
+            created, status, pickled = snapshots[key]
+        except KeyError:
+            return None
+        except Exception as e:
+            log().debug("Ignoring unreadable built show %s: %s" % (sid, e))
+            return None
+        self._touchCached('shows', key)
+
+        if status is not None:
+            self._setSeriesStatus(sid, status)
+        ttl = min(
+            self._ttl(self.config['url_seriesInfo'] % sid, language),
+            self._ttl(self.config['url_epInfo'] % sid, language))
+        if not self.config['offline'] and datetime.datetime.utcnow() - created > ttl:
+            return None
+
+        try:
+            show = pickle.loads(zlib.decompress(pickled))
+        except Exception as e:
+            log().debug("Ignoring unreadable built show %s: %s" % (sid, e))
+            return None
+        log().debug("Using built show %s from the cache" % sid)
+
+        show._tvdb = self
+        if self.config['banners_enabled']:
+            show.data.setdefault('_banners', LazyData(lambda: self._getBanners(sid)))
+        else:
+            show.data.pop('_banners', None)
+        if self.config['actors_enabled']:
+            show.data.setdefault('_actors', LazyData(lambda: self._getActors(sid)))
+        else:
+            show.data.pop('_actors', None)
+
+        if not show._allSeasonsLoaded and not self.config['lazy_seasons']:
+            show._loadAllSeasons()
+            self._storeSnapshot(sid, language, show)
+        return show
+
+    def _discardSnapshots(self, sid, languages):
+        """Removes the built show sid in each of languages (in both
+        episode orders) from the table of built shows
+        """
+        snapshots = self._showSnapshots()
+        if snapshots is None:
+            return
+        budget = getattr(self.session.cache, '_budget', None)
+        for language in languages:
+            for dvdorder in [False, True]:
+                key = self._snapshotKey(sid, language, dvdorder)
+                try:
+                    del snapshots[key]
+                except KeyError:
+                    continue
+                if budget is not None:
+                    budget.forget('shows', key)
+
+    def _responseChanged(self, request):
+        """Called by the session when a new response to request was
+        cached. Built shows using the series information or episode list
+        are out of date, and must be built again (episode queries are
+        only used for seasons loaded after the show was stored)
+        """
+        name, sid = _endpoint(request.url)
+        if name in ['series', 'episodes'] and sid is not None and '/episodes/query' not in request.url:
+            self._discardSnapshots(sid, [request.headers.get('Accept-Language')])
+
+    def _storeSnapshot(self, sid, language, show):
+        """Stores show in the table of built shows. Nothing is stored in
+        offline mode, where the show may be built from expired responses
+        """
+        if self.config['offline']:
+            return
+        snapshots = self._showSnapshots()
+        if snapshots is None:
+            return
+        # the show is as old as the oldest response it was built from,
+        # which may be a stale one (see stale_while_revalidate)
+        created = datetime.datetime.utcnow()
+        for url in [self.config['url_seriesInfo'] % sid, self.config['url_epInfo'] % sid]:
+            key = self._responseCacheKey(url, language)
+            cached_at = response_cache.cached_at(key) if key is not None else None
+            if cached_at is not None:
+                created = min(created, cached_at)
+
+        with show._lock:
+            pickled = zlib.compress(pickle.dumps(show, pickle.HIGHEST_PROTOCOL))
+        key = self._snapshotKey(sid, language)
+        try:
+            snapshots[key] = (created, show.data.get('status'), pickled)
+            budget = getattr(self.session.cache, '_budget', None)
+            if budget is not None:
+                budget.written('shows', key)
+        except Exception as e:
+            log().warning("Could not store built show %s: %s" % (sid, e))
+
+    def _buildShow(self, sid, results):
+        """Returns a new Show built from results, a dict of the responses
+        to the series information ('series') and episodes ('episodes')
+        requests, plus the '_banners' and '_actors' (or LazyData
+        placeholders for them) if enabled.
+
+        The show is not added to self.shows, so other threads never see
+        a partly built show: see _installShow
+        """
+        show = Show()
+        if results['series'].get('status') is not None:
+            self._setSeriesStatus(sid, results['series']['status'])
+
         # Parse show information
-        log().debug('Getting all series data for %s' % (sid))
-        seriesInfoEt = self._getetsrc(
-            self.config['url_seriesInfo'] % sid
-        )
+        seriesInfoEt = results['series']
         for curInfo in seriesInfoEt.keys():
             tag = curInfo
             value = seriesInfoEt[curInfo]
@@ -1103,25 +3130,27 @@ class Tvdb:
                 if tag in ['banner', 'fanart', 'poster']:
                     value = self.config['url_artworkPrefix'] % (value)
 
-            self._setShowData(sid, tag, value)
+            self._setShowData(sid, tag, value, show=show)
         # set language
-        self._setShowData(sid, u'language', self.config['language'])
+        self._setShowData(sid, u'language', self.config['language'], show=show)
 
         # Parse banners
-        if self.config['banners_enabled']:
-            self._parseBanners(sid)
+        if '_banners' in results:
+            self._setShowData(sid, '_banners', results['_banners'], show=show)
 
         # Parse actors
-        if self.config['actors_enabled']:
-            self._parseActors(sid)
+        if '_actors' in results:
+            self._setShowData(sid, '_actors', results['_actors'], show=show)
 
         # Parse episode data
-        log().debug('Getting all episodes of %s' % (sid))
-
-        url = self.config['url_epInfo'] % sid
-
-        epsEt = self._getetsrc(url, language=language)
+        self._setEpisodes(sid, results.get('episodes') or [], show=show)
+        return show
 
+    def _setEpisodes(self, sid, epsEt, season=None, show=None):
+        """Adds each episode from the episodes response epsEt to
+        self.shows[sid] (or show). If season is given, episodes of other
+        seasons are skipped
+        """
         for cur_ep in epsEt:
 
             if self.config['dvdorder']:
@@ -1148,13 +3177,107 @@ class Tvdb:
             seas_no = elem_seasnum
             ep_no = elem_epno
 
+            if season is not None and seas_no != season:
+                continue
+
             for cur_item in cur_ep.keys():
                 tag = cur_item
                 value = cur_ep[cur_item]
                 if value is not None:
                     if tag == 'filename':
                         value = self.config['url_artworkPrefix'] % (value)
-                self._setItem(sid, seas_no, ep_no, tag, value)
+                self._setItem(sid, seas_no, ep_no, tag, value, show=show)
+
+    def _loadSeason(self, show, season):
+        """Requests only the episodes of one season of show, through the
+        episodes query endpoint (used in lazy_seasons mode)
+
+        With DVD ordering, episodes without DVD numbers are placed by
+        their aired season, so both the DVD and aired season are queried
+        """
+        sid = show.data['id']
+        log().debug('Getting season %s of %s' % (season, sid))
+        queries = ['airedSeason=%s' % season]
+        if self.config['dvdorder']:
+            queries.append('dvdSeason=%s' % season)
+
+        epsEt = []
+        for eps in _mapParallel(
+                lambda query: self._getetsrc(self.config['url_epQuery'] % (sid, query)),
+                queries,
+                self._executor()):
+            epsEt.extend(eps or [])
+
+        self._addSeasons(sid, show, epsEt, season=season)
+
+    def _loadAllSeasons(self, show):
+        """Requests every episode of show, which was looked up in
+        lazy_seasons mode
+        """
+        sid = show.data['id']
+        log().debug('Getting all episodes of %s' % (sid))
+        epsEt = self._getetsrc(self.config['url_epInfo'] % sid)
+
+        self._addSeasons(sid, show, epsEt or [])
+
+    def _addSeasons(self, sid, show, epsEt, season=None):
+        """Adds the seasons of show which are not loaded yet from the
+        episodes response epsEt. Each season is built completely before
+        it is added, so other threads never see a partly filled season
+        """
+        loaded = Show()
+        self._setEpisodes(sid, epsEt, season=season, show=loaded)
+        for seas_no, cur_season in dict.items(loaded):
+            if not dict.__contains__(show, seas_no):
+                cur_season.show = show
+                dict.__setitem__(show, seas_no, cur_season)
+        self._installShow(sid, show)
+
+    def _getSummary(self, sid):
+        """Requests the episode summary of show sid (see Show.summary)
+        """
+        log().debug('Getting episode summary of %s' % (sid))
+        return self._getetsrc(self.config['url_epSummary'] % sid) or {}
+
+    def _installShow(self, sid, show):
+        """Makes self.shows[sid] the fully built show (also used to put a
+        show back if it was dropped from self.shows meanwhile)
+        """
+        with self._showsLock:
+            if self.shows.get(sid) is not show:
+                self.shows[sid] = show
+
+    def iter_episodes(self, sid, language=None):
+        """Yields the episodes of the show with series ID sid as Episode
+        instances (which have no parent season), without building a Show.
+
+        Episodes are yielded as each page of the episode list arrives, and
+        the next page is only requested when the previous one has been
+        consumed, so stopping early skips loading the rest of the list:
+
+        >>> t = Tvdb()
+        >>> for ep in t.iter_episodes(76156):
+        ...     if ep['episodeName'] == 'My Old Lady':
+        ...         break
+        >>> ep
+        <Episode 01x04 - u'My Old Lady'>
+        """
+        url = self.config['url_epInfo'] % sid
+        for page_data in self._iterPages(url, language=language):
+            for cur_ep in page_data:
+                yield self._buildEpisode(cur_ep)
+
+    def _buildEpisode(self, cur_ep):
+        """Returns an Episode (with no parent season) holding the episode
+        cur_ep from an episodes response
+        """
+        episode = Episode()
+        for tag, value in cur_ep.items():
+            if value is not None:
+                if tag == 'filename':
+                    value = self.config['url_artworkPrefix'] % (value)
+            episode[tag] = value
+        return episode
 
     def _nameToSid(self, name):
         """Takes show name, returns the correct series ID (if the show has
@@ -1165,30 +3288,270 @@ class Tvdb:
             log().debug('Correcting %s to %s' % (name, self.corrections[name]))
             sid = self.corrections[name]
         else:
-            log().debug('Getting show %s' % name)
-            selected_series = self._getSeries(name)
-            sid = selected_series['id']
-            log().debug('Got %(seriesName)s, id %(id)s' % selected_series)
-
+            # threads looking up the same show (ignoring case) at the same
+            # time share one search and download
+            sid = self._flights.do(
+                ('name', name.strip().lower(), self.config['language']),
+                lambda: self._lookupName(name))
             self.corrections[name] = sid
-            self._getShowData(selected_series['id'], self.config['language'])
 
         return sid
 
+    def _lookupName(self, name):
+        log().debug('Getting show %s' % name)
+        selected_series = self._getSeries(name)
+        sid = self._setCorrection(name, selected_series)
+        self._loadShow(selected_series['id'], self.config['language'])
+        return sid
+
+    def _loadShow(self, sid, language):
+        """Calls _getShowData, shared by threads loading the same show at
+        the same time
+        """
+        self._flights.do(('sid', sid, language), lambda: self._getShowData(sid, language))
+
+    def _setCorrection(self, name, selected_series):
+        """Remembers the series selected for show name, returns its ID
+        """
+        sid = selected_series['id']
+        log().debug('Got %(seriesName)s, id %(id)s' % selected_series)
+
+        self.corrections[name] = sid
+        return sid
+
     def __getitem__(self, key):
         """Handles tvdb_instance['seriesname'] calls.
         The dict index should be the show id
         """
         if isinstance(key, int_types):
             # Item is integer, treat as show id
-            if key not in self.shows:
-                self._getShowData(key, self.config['language'])
-            return self.shows[key]
+            sid = key
+        else:
+            sid = self._nameToSid(key)
+            log().debug('Got series id %s' % sid)
 
-        sid = self._nameToSid(key)
-        log().debug('Got series id %s' % sid)
+        if sid not in self.shows:
+            # never loaded, or dropped from self.shows since (see max_shows)
+            self._loadShow(sid, self.config['language'])
         return self.shows[sid]
 
+    def get(self, key, deadline=None):
+        """Returns the show with the given name or series ID, like
+        tvdb_instance[key].
+
+        deadline is the number of seconds the whole lookup (searching,
+        selecting the series and loading every page of its data) may
+        take. When it passes, tvdb_deadlineexceeded is raised. Data
+        requested later (lazy seasons, banners and actors) is not covered.
+
+        >>> t = Tvdb()
+        >>> t.get('scrubs', deadline=2.0)['seriesName']
+        u'Scrubs'
+        """
+        if deadline is None:
+            return self[key]
+
+        previous = _deadline()
+        end = time.time() + deadline
+        if previous is not None:
+            end = min(end, previous)
+        _local.deadline = end
+        try:
+            return self[key]
+        finally:
+            _local.deadline = previous
+
+    def prefetch(self, names_or_ids, workers=None):
+        """Loads many shows at once, each given by show name or series ID,
+        using up to workers threads (defaults to config['workers']). The
+        requests of all the shows share the config['workers'] threads of
+        this instance.
+
+        Shows are loaded exactly as t[name_or_id] would, filling self.shows
+        and self.corrections. Returns a list of (name_or_id, result) tuples
+        in the order given, where result is the Show, or the exception
+        raised while loading it, so one bad name does not stop the others:
+
+        >>> t = Tvdb()
+        >>> for name, result in t.prefetch(['scrubs', 'the fake show thingy']):
+        ...     print(name, type(result).__name__)
+        scrubs Show
+        the fake show thingy tvdb_shownotfound
+
+        As the shows are selected concurrently, this should not be used
+        with the interactive console UI. Only the latest max_shows shows
+        (see Tvdb) stay in self.shows; looking up one of the others loads
+        it again, from the cache if enabled.
+        """
+        if workers is None:
+            workers = self.config['workers']
+
+        def load(key):
+            try:
+                return self[key]
+            except Exception as e:
+                log().debug('Prefetching %r failed: %s' % (key, e))
+                return e
+
+        # load each distinct show once, even if given several times
+        keys = _distinct(names_or_ids)
+        if workers == self.config['workers']:
+            results = dict(zip(keys, _mapParallel(load, keys, self._executor())))
+        elif ThreadPoolExecutor is None or workers <= 1:
+            results = dict(zip(keys, _mapParallel(load, keys, None)))
+        else:
+            # the shows are loaded by a pool of their own, while their
+            # requests still share the pool of this instance
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = dict(zip(keys, _mapParallel(load, keys, executor)))
+
+        return [(key, results[key]) for key in names_or_ids]
+
+    def sync(self, since=None):
+        """Asks thetvdb.com which series changed since the last sync, and
+        removes only those from the cache (and self.shows), so they are
+        requested again the next time they are looked up. Everything else
+        stays cached, however old.
+
+        since (seconds since the epoch) defaults to the time of the last
+        sync, which is stored in the cache directory. If there was no
+        earlier sync, only the time is recorded. Returns the list of
+        series IDs which changed.
+
+        >>> t = Tvdb()
+        >>> t.sync() #doctest: +SKIP
+        [76156, 80379]
+        """
+        now = int(time.time())
+        if since is None:
+            since = self._lastSync()
+        if since is None:
+            log().debug("First sync, only storing the time")
+            self._storeLastSync(now)
+            return []
+
+        changed = []
+        # thetvdb.com returns the updates of at most a week at a time
+        start = int(since)
+        while start < now:
+            end = min(start + 7 * 24 * 60 * 60, now)
+            updates = self._getetsrc(self.config['url_updated'] % (start, end)) or []
+            for update in updates:
+                if update['id'] not in changed:
+                    changed.append(update['id'])
+            start = end
+
+        log().debug("%d series changed since %s" % (len(changed), since))
+        for sid in changed:
+            self._invalidateSeries(sid)
+        self._storeLastSync(now)
+        return changed
+
+    def _invalidateSeries(self, sid):
+        """Removes the show with series ID sid from self.shows, and every
+        cached response about it in any language
+        """
+        with self._showsLock:
+            self.shows.pop(sid, None)
+        self._seriesStatuses.pop(sid, None)
+
+        if getattr(self.session, 'cache', None) is None:
+            return
+        if not self._isSeriesCached(sid):
+            # the updates list every series changed on thetvdb.com, most
+            # of which were never looked up here
+            return
+
+        self._discardSnapshots(sid, self.config['valid_languages'])
+
+        for language in self.config['valid_languages']:
+            urls = [
+                self.config['url_seriesInfo'] % sid,
+                self.config['url_epInfo'] % sid,
+                self.config['url_actorsInfo'] % sid,
+            ]
+
+            # the cached summary and images list tell which season and
+            # image type queries may be cached
+            summary = self._deleteCached(self.config['url_epSummary'] % sid, language) or {}
+            for order in ['airedSeason', 'dvdSeason']:
+                for season in summary.get(order + 's') or []:
+                    urls.append(self.config['url_epQuery'] % (sid, '%s=%s' % (order, season)))
+
+            images = self._deleteCached(self.config['url_seriesBanner'] % sid, language) or {}
+            for key_type in images:
+                urls.append(self.config['url_seriesBannerInfo'] % (sid, key_type))
+
+            for url in urls:
+                self._deleteCached(url, language)
+
+            page = 2
+            while self._deleteCached(_pageUrl(self.config['url_epInfo'] % sid, page), language) is not None:
+                page += 1
+
+    def _isSeriesCached(self, sid):
+        """Returns True if the series information or first page of
+        episodes of sid, or a built show of it, is cached in any language
+        """
+        keys = []
+        for language in self.config['valid_languages']:
+            for url in [self.config['url_seriesInfo'] % sid, self.config['url_epInfo'] % sid]:
+                key = self._cacheKey(url, language)
+                if key is not None:
+                    keys.append(key)
+        if any(response_cache.cached_at((self.config['cache_location'], key)) is not None for key in keys):
+            return True
+        if keys and _containsAny(self.session.cache.responses, keys):
+            return True
+
+        snapshots = self._showSnapshots()
+        return snapshots is not None and _containsAny(snapshots, [
+            self._snapshotKey(sid, language, dvdorder)
+            for language in self.config['valid_languages']
+            for dvdorder in [False, True]])
+
+    def _deleteCached(self, url, language):
+        """Removes the cached response to url in language. Returns the
+        data of the response, or None if it was not cached
+        """
+        key = self._cacheKey(url, language)
+        if key is None:
+            return None
+        response_cache.discard((self.config['cache_location'], key))
+        response, created = self.session.cache.get_response_and_time(key)
+        if response is None:
+            return None
+        self.session.cache.delete(key)
+        try:
+            return response.json().get('data') or {}
+        except (ValueError, AttributeError):
+            return {}
+
+    def _syncFile(self):
+        if self.config['cache_location'] is None:
+            return None
+        return self.config['cache_location'] + ".sync"
+
+    def _lastSync(self):
+        """Returns the time of the last sync, or None
+        """
+        if self._syncFile() is None:
+            return self._lastSyncTime
+        try:
+            with open(self._syncFile()) as f:
+                return json.load(f)['lastSync']
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+
+    def _storeLastSync(self, timestamp):
+        self._lastSyncTime = timestamp
+        if self._syncFile() is None:
+            return
+        try:
+            _writeJson(self._syncFile(), {'lastSync': timestamp})
+        except (IOError, OSError) as e:
+            log().warning("Could not store sync time in %s: %s" % (self._syncFile(), e))
+
     def __repr__(self):
         return repr(self.shows)
 
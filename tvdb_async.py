@@ -0,0 +1,373 @@
+#!/usr/bin/env python
+#encoding:utf-8
+#author:dbr/Ben
+#project:tvdb_api
+#repository:http://github.com/dbr/tvdb_api
+#license:unlicense (http://unlicense.org/)
+
+"""asyncio interface to The TVDB's API (thetvdb.com), using aiohttp
+
+Requires Python 3.6 and aiohttp (pip install tvdb_api[async]). Returns the
+same Show, Season and Episode objects as tvdb_api.Tvdb.
+
+Example usage:
+
+>>> import asyncio
+>>> from tvdb_async import AsyncTvdb
+>>> async def cabin_fever():
+...     async with AsyncTvdb() as t:
+...         show = await t['Lost']
+...         return show[4][11]['episodeName']
+>>> asyncio.get_event_loop().run_until_complete(cabin_fever())
+'Cabin Fever'
+"""
+
+__author__ = "dbr/Ben"
+__version__ = "2.0-dev"
+
+import json
+import random
+import asyncio
+
+import aiohttp
+
+import tvdb_api
+from tvdb_api import (Tvdb, int_types, url_quote, log, _distinct, _nextPage,
+                      _pageUrl, _remainingPages, tvdb_exception, tvdb_error,
+                      tvdb_deadlineexceeded, tvdb_notcached)
+
+
+class AsyncTvdb(object):
+    """Create easy-to-use asyncio interface to name of season/episode name.
+
+    Takes the same arguments as Tvdb, except cache: responses are not
+    cached, so in offline mode every request raises tvdb_notcached.
+    Requests go through the same process-wide rate limiter and circuit
+    breaker as Tvdb's, with the same retries and timeouts.
+
+    Shows are loaded completely (lazy_seasons has no effect), and banners
+    and actors (when enabled) are requested along with the rest of the
+    show, rather than on first access. The episode summary is requested
+    with await t.summary(key).
+
+    An existing aiohttp.ClientSession can be passed as session (its own
+    timeouts then apply), otherwise one is created on the first request
+    and closed by close() (or by using the instance as an async context
+    manager).
+
+    Looking up a show returns an awaitable:
+
+    >>> show = await t['Scrubs']
+    >>> show[1][24]['episodeName']
+    'My Last Day'
+    """
+    def __init__(self, *args, **kwargs):
+        self._http = kwargs.pop('session', None)
+        self._ownsHttp = self._http is None
+        kwargs['cache'] = False
+        kwargs['lazy_seasons'] = False
+        # Holds the configuration, login and shows, and parses the
+        # responses and builds the shows. It never sends a request itself
+        self._tvdb = Tvdb(*args, **kwargs)
+        self.config = self._tvdb.config
+        self.shows = self._tvdb.shows
+        self.corrections = self._tvdb.corrections
+        self._authLock = None
+
+    @property
+    def headers(self):
+        return self._tvdb.headers
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Closes the aiohttp session, if it was created by this instance
+        """
+        if self._ownsHttp and self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    def _getHttp(self):
+        if self._http is None:
+            connect_timeout, read_timeout = self.config['timeout']
+            self._http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(
+                total=None, sock_connect=connect_timeout, sock_read=read_timeout))
+        return self._http
+
+    async def _request(self, method, url, **kwargs):
+        """Sends a request to thetvdb.com, returning the status and the
+        decoded JSON response. Like TvdbAdapter, the circuit breaker can
+        stop the request, and every unexpected exception counts as a
+        failure
+        """
+        if self.config['offline']:
+            raise tvdb_notcached("%s is not in the cache (AsyncTvdb does not cache responses)" % url)
+
+        token = None
+        if not self.config['force_connect']:
+            token = tvdb_api.circuit_breaker.allow()
+            if token is None:
+                raise tvdb_error("thetvdb.com failed repeatedly, not connecting for up to %s seconds" % (
+                    tvdb_api.circuit_breaker.reset_timeout))
+
+        try:
+            status, body = await self._send(method, url, **kwargs)
+        except (tvdb_exception, asyncio.CancelledError):
+            # failures were already counted, and being cancelled (by a
+            # deadline, for example) says nothing about thetvdb.com
+            raise
+        except Exception:
+            tvdb_api.circuit_breaker.failure()
+            raise
+        finally:
+            tvdb_api.circuit_breaker.release(token)
+        return status, json.loads(body.decode('utf-8'))
+
+    async def _send(self, method, url, **kwargs):
+        """Sends a request through the shared rate limiter, retrying
+        connection errors, timeouts and 5xx responses like TvdbAdapter.
+        Returns the status and body of the response
+        """
+        attempt = 0
+        while True:
+            await self._acquire()
+            try:
+                async with self._getHttp().request(method, url, **kwargs) as response:
+                    if response.status < 500:
+                        body = await response.read()
+                        tvdb_api.circuit_breaker.success()
+                        return response.status, body
+                    error = "HTTP error %s" % response.status
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+
+            if attempt >= self.config['retries']:
+                tvdb_api.circuit_breaker.failure()
+                raise tvdb_error("Could not load %s: %s" % (url, error))
+
+            delay = random.uniform(0, self.config['retry_backoff'] * 2 ** attempt)
+            attempt += 1
+            log().debug("Loading %s failed (%s), retrying in %.2f seconds" % (url, error, delay))
+            await asyncio.sleep(delay)
+
+    async def _acquire(self):
+        """Waits until the shared rate limiter lets another request through
+        """
+        while True:
+            wait = tvdb_api.rate_limiter._reserve()
+            if wait is None:
+                return
+            await asyncio.sleep(wait)
+
+    async def _loadUrl(self, url, language=None):
+        """Return response from The TVDB API, requesting the remaining
+        pages of a paginated result concurrently (at most config['workers']
+        at once) once the first page has reported the last page number
+        """
+        language = self._tvdb._checkLanguage(language)
+
+        data, links = await self._loadPage(url, language)
+        if not _nextPage(links):
+            return data
+
+        data = list(data or [])
+        semaphore = asyncio.Semaphore(max(1, self.config['workers']))
+
+        async def load(page_url):
+            async with semaphore:
+                return await self._loadPage(page_url, language)
+
+        pages = _remainingPages(url, links, data)
+        try:
+            page_urls = next(pages)
+            while True:
+                page_urls = pages.send(await asyncio.gather(*[load(page_url) for page_url in page_urls]))
+        except StopIteration:
+            pass
+
+        return data
+
+    async def _iterPages(self, url, language=None):
+        language = self._tvdb._checkLanguage(language)
+
+        page_data, links = await self._loadPage(url, language)
+        while True:
+            yield page_data or []
+
+            next_page = _nextPage(links)
+            if not next_page:
+                break
+            page_data, links = await self._loadPage(_pageUrl(url, next_page), language)
+
+    async def _loadPage(self, url, language):
+        if self._authLock is None:
+            self._authLock = asyncio.Lock()
+
+        if not self._tvdb._authorized or self._tvdb._tokenExpiresSoon():
+            async with self._authLock:
+                # pages loaded concurrently must only log in once
+                if not self._tvdb._authorized or self._tvdb._tokenExpiresSoon():
+                    await self.authorize()
+
+        token_generation = self._tvdb._tokenGeneration
+        status, r = await self._get(url, language)
+
+        if self._tvdb._isNotAuthorized(status, r):
+            # the token expired or was revoked: log in again once, shared
+            # by every request which failed with the same token, then retry
+            log().debug("Not authorized to load %s, authorizing again" % url)
+            async with self._authLock:
+                if self._tvdb._tokenGeneration == token_generation:
+                    await self.authorize()
+            status, r = await self._get(url, language)
+
+        return self._tvdb._parseResponse(r, url, language)
+
+    async def _get(self, url, language):
+        return await self._request('GET', url, headers=self._tvdb._requestHeaders(language))
+
+    async def authorize(self):
+        """Logs in to thetvdb.com
+        """
+        log().debug("auth")
+        headers = dict(self.headers)
+        headers.pop('Authorization', None)
+        status, r_json = await self._request(
+            'POST', self.config['url_login'], json=self.config['auth_payload'], headers=headers)
+        self._tvdb._setToken(r_json)
+
+    async def _getetsrc(self, url, language=None):
+        return await self._loadUrl(url, language=language)
+
+    async def search(self, series):
+        """This searches TheTVDB.com for the series name
+        and returns the result list
+        """
+        series = url_quote(series.encode("utf-8"))
+        log().debug("Searching for show %s" % series)
+        seriesEt = await self._getetsrc(self.config['url_getSeries'] % (series))
+        return self._tvdb._parseSearchResults(seriesEt)
+
+    async def _getBanners(self, sid):
+        log().debug('Getting season banners for %s' % (sid))
+        bannersEt = await self._getetsrc(self.config['url_seriesBanner'] % sid) or {}
+        all_banners_info = await asyncio.gather(*[
+            self._getetsrc(self.config['url_seriesBannerInfo'] % (sid, cur_banner))
+            for cur_banner in bannersEt.keys()])
+        return self._tvdb._buildBanners(all_banners_info)
+
+    async def _getActors(self, sid):
+        log().debug("Getting actors for %s" % (sid))
+        actorsEt = await self._getetsrc(self.config['url_actorsInfo'] % (sid))
+        return self._tvdb._buildActors(actorsEt)
+
+    async def _getShowData(self, sid, language):
+        """Requests the series information, episodes, banners and actors
+        of a show at the same time, then fills in self.shows[sid]
+        """
+        log().debug('Getting all series data and episodes of %s' % (sid))
+        jobs = [
+            (name, self._getetsrc(url, language=url_language))
+            for name, url, url_language in self._tvdb._showRequests(sid, language)]
+        if self.config['banners_enabled']:
+            jobs.append(('_banners', self._getBanners(sid)))
+        if self.config['actors_enabled']:
+            jobs.append(('_actors', self._getActors(sid)))
+
+        results = await asyncio.gather(*[job for name, job in jobs])
+        show = self._tvdb._buildShow(sid, dict(zip([name for name, job in jobs], results)))
+        self._tvdb._installShow(sid, show)
+
+    async def iter_episodes(self, sid, language=None):
+        """Asynchronously yields the episodes of the show with series ID
+        sid as Episode instances, requesting each page as it is needed
+        (see Tvdb.iter_episodes)
+        """
+        url = self.config['url_epInfo'] % sid
+        async for page_data in self._iterPages(url, language=language):
+            for cur_ep in page_data:
+                yield self._tvdb._buildEpisode(cur_ep)
+
+    async def _nameToSid(self, name):
+        if name in self.corrections:
+            log().debug('Correcting %s to %s' % (name, self.corrections[name]))
+            sid = self.corrections[name]
+        else:
+            log().debug('Getting show %s' % name)
+            allSeries = await self.search(name)
+            selected_series = self._tvdb._selectSeries(allSeries)
+            sid = self._tvdb._setCorrection(name, selected_series)
+            await self._getShowData(selected_series['id'], self.config['language'])
+
+        return sid
+
+    async def _getShow(self, key):
+        if isinstance(key, int_types):
+            # Item is integer, treat as show id
+            sid = key
+        else:
+            sid = await self._nameToSid(key)
+            log().debug('Got series id %s' % sid)
+
+        if sid not in self.shows:
+            # never loaded, or dropped from self.shows since (see max_shows)
+            await self._getShowData(sid, self.config['language'])
+        return self.shows[sid]
+
+    def __getitem__(self, key):
+        """Returns an awaitable for the show with the given name or
+        series ID: show = await t['Lost']
+        """
+        return self._getShow(key)
+
+    async def get(self, key, deadline=None):
+        """Returns the show with the given name or series ID, like
+        await t[key]. When the whole lookup takes longer than deadline
+        seconds, it is cancelled and tvdb_deadlineexceeded is raised
+        """
+        if deadline is None:
+            return await self._getShow(key)
+        try:
+            return await asyncio.wait_for(self._getShow(key), deadline)
+        except asyncio.TimeoutError:
+            raise tvdb_deadlineexceeded("Deadline exceeded looking up %r" % (key,))
+
+    async def summary(self, key):
+        """Returns the episode summary (see Show.summary) of the show with
+        the given name or series ID, requesting it once. Afterwards
+        show.summary() returns it too
+        """
+        show = await self._getShow(key)
+        if show._summary is None:
+            log().debug('Getting episode summary of %s' % (show.data['id']))
+            show._summary = await self._getetsrc(self.config['url_epSummary'] % show.data['id']) or {}
+        return show._summary
+
+    async def prefetch(self, names_or_ids, workers=None):
+        """Loads many shows at once (at most workers at a time), returning
+        a list of (name_or_id, result) tuples where result is the Show or
+        the exception raised while loading it (see Tvdb.prefetch)
+        """
+        if workers is None:
+            workers = self.config['workers']
+        semaphore = asyncio.Semaphore(max(1, workers))
+
+        async def load(key):
+            async with semaphore:
+                try:
+                    return await self._getShow(key)
+                except Exception as e:
+                    log().debug('Prefetching %r failed: %s' % (key, e))
+                    return e
+
+        keys = _distinct(names_or_ids)
+        results = dict(zip(keys, await asyncio.gather(*[load(key) for key in keys])))
+
+        return [(key, results[key]) for key in names_or_ids]
+
+    def __repr__(self):
+        return repr(self.shows)
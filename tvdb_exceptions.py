@@ -15,7 +15,8 @@ import logging
 
 __all__ = ["tvdb_error", "tvdb_userabort", "tvdb_notauthorized", "tvdb_shownotfound",
 "tvdb_seasonnotfound", "tvdb_episodenotfound", "tvdb_attributenotfound",
-"tvdb_resourcenotfound", "tvdb_invalidlanguage"]
+"tvdb_resourcenotfound", "tvdb_invalidlanguage", "tvdb_deadlineexceeded",
+"tvdb_notcached"]
 
 logging.getLogger(__name__).warning(
     "tvdb_exceptions module is deprecated - use classes directly from tvdb_api instead")
@@ -24,5 +25,5 @@ from tvdb_api import (
     tvdb_error, tvdb_userabort, tvdb_notauthorized, tvdb_shownotfound,
     tvdb_seasonnotfound, tvdb_episodenotfound,
     tvdb_resourcenotfound, tvdb_invalidlanguage,
-    tvdb_attributenotfound
+    tvdb_attributenotfound, tvdb_deadlineexceeded, tvdb_notcached
 )